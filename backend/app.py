@@ -1,7 +1,7 @@
 # backend/app.py
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from models import db, User
+from models import db
 from routes.reservations import reservation_bp
 from routes.auth import auth_bp
 from routes.users import users_bp
@@ -9,16 +9,26 @@ from routes.tools import tools_bp
 from routes.permissions import permissions_bp
 from setup import create_initial_data
 from flask_migrate import Migrate
-from datetime import datetime, UTC
-from utils.permissions import get_token_payload
+from utils.auth_utils import get_identity
+from utils.activity import activity_buffer
 from routes.logs import logs_bp
+from routes.labels import labels_bp
 import os
-from utils.logger import write_log
+from utils.logger import write_log, log_writer
+from utils.log_throttle import log_throttle
+from utils.schema import ensure_schema
+from utils.tool_search import ensure_tool_search
 from werkzeug.exceptions import HTTPException
 
 # APScheduler importieren
 from flask_apscheduler import APScheduler
-from scheduler.tasks import reset_expired_borrowed_tools, sync_borrowed_status_fast
+from scheduler.tasks import (
+    reset_expired_borrowed_tools,
+    purge_old_reservations,
+    purge_old_logs,
+    RESERVATION_RETENTION_DAYS,
+)
+from scheduler.borrowed_engine import borrowed_engine
 
 
 app = Flask(__name__)
@@ -43,7 +53,15 @@ app.config.from_object(Config())
 # DB & CORS
 db.init_app(app)
 migrate = Migrate(app, db)
-CORS(app, supports_credentials=True, resources={r"/api/*": {"origins": "*"}})
+
+# Logs werden gebündelt im Hintergrund geschrieben
+log_writer.init_app(app)
+CORS(
+    app,
+    supports_credentials=True,
+    resources={r"/api/*": {"origins": "*"}},
+    expose_headers=["X-Next-Cursor", "X-Revision"],
+)
 
 
 # Blueprints registrieren
@@ -53,6 +71,7 @@ app.register_blueprint(users_bp)  # enthält schon /api/... in den Routen
 app.register_blueprint(tools_bp)  # enthält schon /api/... in den Routen
 app.register_blueprint(permissions_bp)  # enthält schon /api/... in den Routen
 app.register_blueprint(logs_bp)
+app.register_blueprint(labels_bp)  # enthält schon /api/... in den Routen
 
 
 @app.route("/api/ping")
@@ -68,7 +87,7 @@ def ping():
 @app.errorhandler(HTTPException)
 def handle_http_exception(e):
     """Saubere JSON-Responses für HTTP-Fehler."""
-    write_log("error", f"{e.code} {e.name}: {e.description}")
+    log_throttle.log("error", f"{e.code} {e.name}: {e.description}")
     response = {
         "error": e.name,
         "message": e.description,
@@ -100,26 +119,9 @@ def update_last_active():
     if not request.path.startswith("/api/"):
         return
 
-    payload = get_token_payload()
-    if not payload:
-        return
-
-    user = db.session.get(User, payload["user_id"])
-    if not user:
-        return
-
-    now = datetime.now(UTC)
-    # Nur aktualisieren, wenn letzte Aktivität älter als 60 Sekunden ist
-    # → schützt DB vor unnötigen Writes bei automatischen Poll-Anfragen
-    if user.last_active:
-        last = user.last_active.replace(tzinfo=UTC)
-    else:
-        last = None
-
-    # Nur wenn älter als 60 Sekunden
-    if not last or (now - last).total_seconds() > 60:
-        user.last_active = now
-        db.session.commit()
+    # Nur im Speicher vormerken → wird gebündelt vom Scheduler geschrieben
+    # (schützt DB vor Writes bei automatischen Poll-Anfragen)
+    activity_buffer.touch(get_identity().user_id)
 
 
 # --- Scheduler starten (mit App-Kontext) ---
@@ -127,6 +129,15 @@ scheduler = APScheduler()
 scheduler.init_app(app)
 scheduler.start()
 
+# is_borrowed wird zu den Start-/Endzeitpunkten der Reservationen gesetzt
+borrowed_engine.init_app(app, scheduler)
+
+# last_active wird gepuffert und alle paar Sekunden gebündelt geschrieben
+activity_buffer.init_app(app, scheduler)
+
+# Wiederholte Fehler-Logs werden zusammengefasst und pro Quelle gedrosselt
+log_throttle.init_app(app, scheduler)
+
 
 def _job_reset_expired_borrowed_tools():
     """Wrapper, damit der Job im App-Kontext läuft (SQLAlchemy braucht Kontext)."""
@@ -137,12 +148,28 @@ def _job_reset_expired_borrowed_tools():
             write_log("error", f"Scheduler error (reset): {repr(e)}")
 
 
-def _job_sync_borrowed_status():
+def _job_purge_old_reservations():
     with app.app_context():
         try:
-            sync_borrowed_status_fast()
+            removed = purge_old_reservations()
+            if removed:
+                write_log(
+                    "purge",
+                    f"Archived {removed} reservations older than "
+                    f"{RESERVATION_RETENTION_DAYS} days",
+                )
         except Exception as e:
-            write_log("error", f"Scheduler error (sync): {repr(e)}")
+            write_log("error", f"Scheduler error (purge): {repr(e)}")
+
+
+def _job_purge_old_logs():
+    with app.app_context():
+        try:
+            removed = purge_old_logs()
+            if removed:
+                write_log("purge", f"Archived {removed} log entries")
+        except Exception as e:
+            write_log("error", f"Scheduler error (log purge): {repr(e)}")
 
 
 # Job hinzufügen: alle 10 Minuten prüfen, ob Werkzeuge automatisch zurückgesetzt werden müssen
@@ -153,30 +180,48 @@ scheduler.add_job(
     minutes=10,
 )
 
-# Kombinierter Sync-Job alle 30 Sekunden
+# Alte Reservationen stündlich in Blöcken archivieren (nie im Request-Pfad)
 scheduler.add_job(
-    id="sync_borrowed_status",
-    func=_job_sync_borrowed_status,
+    id="purge_old_reservations",
+    func=_job_purge_old_reservations,
     trigger="interval",
-    seconds=30,
+    hours=1,
+)
+
+# Alte Logs gemäss Aufbewahrungsfrist stündlich archivieren
+scheduler.add_job(
+    id="purge_old_logs",
+    func=_job_purge_old_logs,
+    trigger="interval",
+    hours=1,
 )
 
 
 def create_app():
+    # Jeder Schritt für sich: ein Fehler (z. B. in der Migration) soll die
+    # übrigen Schritte nicht verhindern
+    steps = (
+        db.create_all,
+        ensure_schema,
+        ensure_tool_search,
+        lambda: create_initial_data(app),
+        _job_reset_expired_borrowed_tools,
+        borrowed_engine.rebuild,
+    )
     with app.app_context():
-        try:
-            db.create_all()
-            create_initial_data(app)
-            _job_reset_expired_borrowed_tools()
-        except Exception as e:
-            write_log("error", f"Startup error: {repr(e)}")
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                db.session.rollback()
+                write_log("error", f"Startup error: {repr(e)}")
     return app
 
 
 @app.errorhandler(404)
 def handle_not_found(e):
     if request.path.startswith("/api/"):
-        write_log("error", f"404 Not Found: {request.path}")
+        log_throttle.log("error", f"404 Not Found: {request.path}")
         return jsonify({"error": "Not Found", "path": request.path}), 404
     return e
 
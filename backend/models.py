@@ -44,6 +44,8 @@ class User(db.Model):
     company_id = db.Column(db.Integer, db.ForeignKey("companies.id"))
     password = db.Column(db.String(255), nullable=False)  # Gehashter Hash
     qr_code = db.Column(db.String(20), unique=True, nullable=False)  # z. B. USR0001
+    # Normalisierter Schlüssel für QR-Lookups (siehe utils/qr_lookup.py)
+    qr_key = db.Column(db.String(20), db.Computed("lower(trim(qr_code))"))
     role_id = db.Column(db.Integer, db.ForeignKey("role.id"), nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -53,12 +55,16 @@ class User(db.Model):
     last_active = db.Column(db.DateTime, nullable=True)
     logs = db.relationship("Log", backref="user", lazy=True)
 
+    __table_args__ = (db.Index("ix_user_qr_key", "qr_key", unique=True),)
+
 
 # Werkzeuge
 class Tool(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     qr_code = db.Column(db.String(20), unique=True, nullable=False)  # z. B. TOOL0001
+    # Normalisierter Schlüssel für QR-Lookups (siehe utils/qr_lookup.py)
+    qr_key = db.Column(db.String(20), db.Computed("lower(trim(qr_code))"))
     status = db.Column(
         db.String(20), default="available"
     )  # available, borrowed, reserved
@@ -68,6 +74,8 @@ class Tool(db.Model):
 
     reservations = db.relationship("Reservation", backref="tool", lazy=True)
 
+    __table_args__ = (db.Index("ix_tool_qr_key", "qr_key", unique=True),)
+
 
 # Reservationen
 class Reservation(db.Model):
@@ -82,6 +90,24 @@ class Reservation(db.Model):
 
     note = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (
+        db.Index("ix_reservation_tool_time", "tool_id", "start_time", "end_time"),
+        db.Index("ix_reservation_start_id", "start_time", "id"),
+    )
+
+
+# Änderungsprotokoll der Reservationen (für Delta-Sync der Clients)
+# → id dient als monoton steigende Revision
+class ReservationChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    reservation_id = db.Column(db.Integer, nullable=False)  # kein FK (Tombstones)
+    tool_id = db.Column(db.Integer, nullable=True)
+    action = db.Column(db.String(10), nullable=False)  # "upsert" | "delete"
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # AUTOINCREMENT: Revisionen werden auch nach dem Aufräumen nie wiederverwendet
+    __table_args__ = {"sqlite_autoincrement": True}
+
 
 # Logs (optional)
 class Log(db.Model):
@@ -89,7 +115,36 @@ class Log(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     action = db.Column(db.String(100), nullable=False)
     details = db.Column(db.Text)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)  # zuletzt gesehen
+    # Zusammengefasste Wiederholungen (siehe utils/log_throttle.py)
+    count = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    first_seen = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_log_timestamp", "timestamp"),
+        db.Index("ix_log_action_timestamp", "action", "timestamp"),
+        db.Index("ix_log_user_timestamp", "user_id", "timestamp"),
+    )
+
+
+# Versionszähler für In-Process-Caches (damit mehrere Worker Änderungen erkennen)
+class CacheVersion(db.Model):
+    key = db.Column(db.String(50), primary_key=True)  # z. B. "permissions"
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Vergabe fortlaufender QR-Nummern pro Präfix (siehe utils/qr_allocator.py)
+class QrSequence(db.Model):
+    prefix = db.Column(db.String(10), primary_key=True)  # z. B. "tool", "usr"
+    # Alle Nummern unterhalb sind belegt oder reserviert
+    next_free = db.Column(db.Integer, nullable=False, default=1)
+
+
+# Für offene Formulare reservierte QR-Nummern (verfallen nach Ablauf)
+class QrReservation(db.Model):
+    prefix = db.Column(db.String(10), primary_key=True)
+    number = db.Column(db.Integer, primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
 
 
 class ToolCategory(db.Model):
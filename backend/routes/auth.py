@@ -1,13 +1,13 @@
 # backend/routes/auth.py
 from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
-from models import db, User, RolePermission, Permission
+from models import db, User
 import jwt
 import os
 from dotenv import load_dotenv
-from utils.permissions import get_token_payload
+from utils.permissions import permission_cache
 from werkzeug.security import check_password_hash, generate_password_hash
-from utils.auth_utils import get_current_user
+from utils.auth_utils import get_current_user, get_identity
 from datetime import datetime, timedelta
 from utils.logger import write_log
 
@@ -61,16 +61,15 @@ def login():
 @auth_bp.route("/me", methods=["GET"])
 @cross_origin(origins="http://localhost:5173", supports_credentials=True)
 def get_me():
-    payload = get_token_payload()
-    if not payload:
+    identity = get_identity()
+    if not identity.payload:
         return jsonify({"error": "Nicht autorisiert"}), 401
 
-    user = db.session.get(User, payload["user_id"])
+    user = identity.user
     if not user:
         return jsonify({"error": "Benutzer nicht gefunden"}), 404
 
-    permissions = RolePermission.query.filter_by(role_id=user.role_id).all()
-    permission_map = {p.permission.key: p.value for p in permissions if p.permission}
+    permission_map = permission_cache.permissions_for_role(user.role_id) or {}
 
     return jsonify(
         {
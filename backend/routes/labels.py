@@ -0,0 +1,105 @@
+# backend/routes/labels.py
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    request,
+    jsonify,
+    stream_with_context,
+)
+from models import db, Tool, User
+from utils.permissions import requires_permission
+from utils.logger import write_log
+from utils import qr_labels
+
+labels_bp = Blueprint("labels", __name__)
+
+FORMATS = {
+    "pdf": ("application/pdf", "qr_etiketten.pdf", qr_labels.iter_pdf),
+    "png": ("application/zip", "qr_etiketten.zip", qr_labels.iter_png_zip),
+}
+
+
+def _id_list(data, key):
+    values = data.get(key) or []
+    if not isinstance(values, list):
+        raise ValueError(key)
+    return [int(v) for v in values]
+
+
+@labels_bp.route("/api/labels", methods=["POST"])
+@requires_permission("export_qr_codes")
+def export_labels():
+    """
+    QR-Etikettenbögen für ausgewählte Werkzeuge/Benutzer/Kategorien.
+
+    Body (JSON):
+      tool_ids / user_ids / category_ids → Auswahl (Kategorien = alle ihre Tools)
+      format                             → "pdf" (Standard) oder "png" (ZIP, ein PNG pro Bogen)
+    Reihenfolge: Werkzeuge nach Name, danach Benutzer nach Nachname.
+    """
+    if not qr_labels.labels_available():
+        return (
+            jsonify({"error": "QR-Etiketten benötigen die Pakete qrcode und Pillow."}),
+            501,
+        )
+
+    data = request.get_json() or {}
+    fmt = FORMATS.get(str(data.get("format") or "pdf").lower())
+    if fmt is None:
+        return jsonify({"error": "Ungültiges Format (pdf oder png)"}), 400
+    try:
+        tool_ids = _id_list(data, "tool_ids")
+        user_ids = _id_list(data, "user_ids")
+        category_ids = _id_list(data, "category_ids")
+    except (TypeError, ValueError):
+        return jsonify({"error": "Ungültige Auswahl"}), 400
+
+    labels = []
+    if tool_ids or category_ids:
+        conditions = []
+        if tool_ids:
+            conditions.append(Tool.id.in_(tool_ids))
+        if category_ids:
+            conditions.append(Tool.category_id.in_(category_ids))
+        rows = (
+            db.session.query(Tool.qr_code, Tool.name)
+            .filter(db.or_(*conditions))
+            .order_by(Tool.name.asc(), Tool.id.asc())
+        )
+        labels += [(code, name) for code, name in rows]
+    if user_ids:
+        rows = (
+            db.session.query(User.qr_code, User.first_name, User.last_name)
+            .filter(User.id.in_(user_ids))
+            .order_by(User.last_name.asc(), User.first_name.asc(), User.id.asc())
+        )
+        labels += [
+            (code, " ".join(n for n in (first, last) if n) or code)
+            for code, first, last in rows
+        ]
+
+    if not labels:
+        return jsonify({"error": "Keine Etiketten ausgewählt"}), 400
+    if len(labels) > qr_labels.MAX_LABELS:
+        return (
+            jsonify(
+                {"error": f"Maximal {qr_labels.MAX_LABELS} Etiketten pro Export"}
+            ),
+            400,
+        )
+
+    directory = qr_labels.cache_dir(current_app.instance_path)
+    images = qr_labels.LabelImages(labels, directory)
+    write_log(
+        "export",
+        f"QR labels exported: {len(labels)} labels "
+        f"({images.cached} cached, {images.rendered} rendered)",
+    )
+
+    mimetype, filename, render = fmt
+    return Response(
+        stream_with_context(render(images)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
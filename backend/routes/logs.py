@@ -1,25 +1,143 @@
-from flask import Blueprint, jsonify
-from models import Log, User
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from models import db, Log, User
+from utils.archive import iter_records
 from utils.permissions import requires_permission
+from utils.pagination import encode_cursor, decode_cursor
+from utils.dates import parse_to_utc
 
 logs_bp = Blueprint("logs", __name__)
 
+# Archiv-Partition für alte Logs (instance/archive/logs)
+LOG_ARCHIVE = "logs"
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
 
 @logs_bp.route("/api/logs", methods=["GET"])
 @requires_permission("access_admin_panel")
 def get_logs():
-    logs = Log.query.order_by(Log.timestamp.desc()).limit(500).all()
+    """
+    Optionale Query-Parameter:
+      action / user_id   → Filter
+      from / to          → Zeitraum
+      q                  → Freitextsuche in details
+      limit / cursor     → Keyset-Pagination über (timestamp, id) absteigend;
+                           der Cursor der nächsten Seite steht im Header X-Next-Cursor
+    """
+    query = db.session.query(
+        Log.id,
+        Log.user_id,
+        Log.action,
+        Log.details,
+        Log.timestamp,
+        Log.count,
+        Log.first_seen,
+        User.username,
+    ).outerjoin(User, User.id == Log.user_id)
+
+    action = request.args.get("action")
+    if action:
+        query = query.filter(Log.action == action)
+
+    user_id = request.args.get("user_id", type=int)
+    if user_id is not None:
+        query = query.filter(Log.user_id == user_id)
+
+    try:
+        if request.args.get("from"):
+            query = query.filter(Log.timestamp >= parse_to_utc(request.args["from"]))
+        if request.args.get("to"):
+            query = query.filter(Log.timestamp < parse_to_utc(request.args["to"]))
+    except ValueError:
+        return jsonify({"error": "Ungültiges Zeitfenster"}), 400
+
+    text = (request.args.get("q") or "").strip()
+    if text:
+        query = query.filter(Log.details.icontains(text, autoescape=True))
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            cursor_ts, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Ungültiger Cursor"}), 400
+        query = query.filter(
+            db.or_(
+                Log.timestamp < cursor_ts,
+                db.and_(Log.timestamp == cursor_ts, Log.id < cursor_id),
+            )
+        )
+
+    limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    # Einen Datensatz mehr laden, um zu erkennen, ob es eine nächste Seite gibt
+    rows = query.order_by(Log.timestamp.desc(), Log.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
-    return jsonify(
+    resp = jsonify(
         [
             {
                 "id": l.id,
                 "user_id": l.user_id,
-                "username": l.user.username if l.user else "Unbekannt",
+                "username": l.username or "Unbekannt",
                 "action": l.action,
                 "details": l.details,
                 "timestamp": l.timestamp.isoformat(),
+                "count": l.count,
+                "first_seen": l.first_seen.isoformat() if l.first_seen else None,
             }
-            for l in logs
+            for l in rows
         ]
     )
+    if has_more:
+        last = rows[-1]
+        resp.headers["X-Next-Cursor"] = encode_cursor(last.timestamp, last.id)
+    return resp
+
+
+# Archivierte Logs (gestreamt als JSON Lines)
+@logs_bp.route("/api/logs/archive", methods=["GET"])
+@requires_permission("access_admin_panel")
+def get_log_archive():
+    """
+    Query-Parameter (alle optional): action, user_id, from / to, q
+    Antwort: application/x-ndjson, ein Eintrag pro Zeile (älteste zuerst).
+    """
+    args = request.args
+    try:
+        start = parse_to_utc(args["from"]) if args.get("from") else None
+        end = parse_to_utc(args["to"]) if args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "Ungültiges Zeitfenster"}), 400
+
+    action = request.args.get("action")
+    user_id = request.args.get("user_id", type=int)
+    text = (request.args.get("q") or "").strip().lower()
+    start_iso = start.isoformat() if start else None
+    end_iso = end.isoformat() if end else None
+
+    def matches(rec):
+        # ISO-Strings (naive UTC) sind lexikografisch sortierbar
+        if start_iso and rec["timestamp"] < start_iso:
+            return False
+        if end_iso and rec["timestamp"] >= end_iso:
+            return False
+        if action and rec["action"] != action:
+            return False
+        if user_id is not None and rec["user_id"] != user_id:
+            return False
+        if text and text not in (rec["details"] or "").lower():
+            return False
+        return True
+
+    def generate():
+        for rec in iter_records(LOG_ARCHIVE, start, end, matches):
+            yield json.dumps(rec, ensure_ascii=False) + "\n"
+
+    return Response(
+        stream_with_context(generate()), mimetype="application/x-ndjson"
+    )
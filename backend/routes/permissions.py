@@ -1,8 +1,14 @@
 # backend/routes/permissions.py
 from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
-from models import db, Role, Permission, RolePermission, User
-from utils.permissions import requires_permission, get_token_payload
+from models import db, Role, Permission, RolePermission
+from utils.permissions import (
+    requires_permission,
+    get_token_payload,
+    invalidate_permissions,
+    permission_cache,
+)
+from utils.revisions import conditional_etag, ROLES, ROLE_PERMISSIONS
 
 permissions_bp = Blueprint("permissions", __name__)
 
@@ -31,6 +37,7 @@ def create_permission():
 
     perm = Permission(key=key)
     db.session.add(perm)
+    invalidate_permissions()
     db.session.commit()
     return jsonify({"id": perm.id, "key": perm.key}), 201
 
@@ -46,6 +53,7 @@ def delete_permission(perm_id):
     # zugehörige Mappings löschen
     RolePermission.query.filter_by(permission_id=perm.id).delete()
     db.session.delete(perm)
+    invalidate_permissions()
     db.session.commit()
     return jsonify({"message": "Permission gelöscht"}), 200
 
@@ -56,6 +64,7 @@ def delete_permission(perm_id):
 @permissions_bp.route("/api/role-permissions", methods=["GET"])
 @cross_origin(origins="http://localhost:5173", supports_credentials=True)
 @requires_permission("access_admin_panel")
+@conditional_etag(ROLES, ROLE_PERMISSIONS)
 def get_role_permissions():
     roles = Role.query.order_by(Role.name.asc()).all()
     perms = Permission.query.order_by(Permission.key.asc()).all()
@@ -103,6 +112,7 @@ def set_role_permission():
             RolePermission(role_id=role.id, permission_id=perm.id, value=value)
         )
 
+    invalidate_permissions()
     db.session.commit()
     return jsonify({"message": "Gespeichert"}), 200
 
@@ -167,6 +177,8 @@ def patch_role_permissions():
             )
             updated += 1
 
+    if updated:
+        invalidate_permissions()
     db.session.commit()
     return jsonify({"updated": updated}), 200
 
@@ -188,12 +200,11 @@ def get_current_user_permissions():
     if not user_id:
         return jsonify({"error": "Not authenticated"}), 401
 
-    user = User.query.get(user_id)
-    if not user:
+    role_id = permission_cache.role_of(user_id)
+    if not role_id:
         return jsonify({"error": "User not found"}), 404
 
-    # Alle RolePermissions der Benutzerrolle holen
-    rps = RolePermission.query.filter_by(role_id=user.role_id).all()
-    result = {Permission.query.get(rp.permission_id).key: rp.value for rp in rps}
+    # Alle RolePermissions der Benutzerrolle (aus dem Cache)
+    result = permission_cache.permissions_for_role(role_id) or {}
 
     return jsonify(result), 200
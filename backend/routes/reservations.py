@@ -1,15 +1,29 @@
 # backend/routes/reservations.py
-from flask import Blueprint, request, jsonify
-from models import db, User, Tool, Reservation, RolePermission, Permission
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from models import db, User, Tool, Reservation, ReservationChange
 from datetime import datetime, timedelta
-from dateutil.parser import isoparse
 from pytz import timezone
 import pytz
-from utils.permissions import get_token_payload
+from utils.permissions import (
+    get_token_payload,
+    requires_permission,
+    permission_cache,
+)
 from utils.logger import write_log
+from utils.dates import parse_to_utc
+from utils.change_log import record_change, current_revision
+from utils.archive import iter_records
+from utils.pagination import encode_cursor, decode_cursor
+from utils.activity import activity_buffer
+from utils.qr_lookup import find_tool_by_qr, find_user_by_qr, normalize_qr
+from utils.serializers import reservation_query, reservation_to_dict, json_response
+import json
 
 reservation_bp = Blueprint("reservations", __name__)
 
+# Archiv-Partition für abgelaufene Reservationen (instance/archive/reservations)
+RESERVATION_ARCHIVE = "reservations"
+
 
 # -----------------------------
 # Helpers
@@ -30,52 +44,68 @@ def _recompute_tool_borrowed(tool_id: int):
     tool.is_borrowed = bool(active)
 
 
+def _find_overlap(tool_id, start, end, exclude_id=None):
+    """
+    ID einer Reservation desselben Werkzeugs, die [start, end) überschneidet,
+    sonst None. Indizierte DB-Abfrage (ix_reservation_tool_time) – damit auch
+    bei mehreren Worker-Prozessen massgeblich.
+    """
+    query = db.session.query(Reservation.id).filter(
+        Reservation.tool_id == tool_id,
+        Reservation.start_time < end,
+        Reservation.end_time > start,
+    )
+    if exclude_id is not None:
+        query = query.filter(Reservation.id != exclude_id)
+    with db.session.no_autoflush:
+        return query.limit(1).scalar()
+
+
+def _booked_intervals(positions):
+    """
+    Bestehende Reservationen eines Batches in einer Abfrage: alle Zeilen der
+    betroffenen Werkzeuge, die [min(start), max(end)) überschneiden, als
+    tool_id → [(start, end), ...]. `positions` = [(tool_id, start, end), ...].
+    """
+    booked = {}
+    if not positions:
+        return booked
+    rows = db.session.query(
+        Reservation.tool_id, Reservation.start_time, Reservation.end_time
+    ).filter(
+        Reservation.tool_id.in_({tool_id for tool_id, _, _ in positions}),
+        Reservation.start_time < max(end for _, _, end in positions),
+        Reservation.end_time > min(start for _, start, _ in positions),
+    )
+    with db.session.no_autoflush:
+        for tool_id, start, end in rows:
+            booked.setdefault(tool_id, []).append((start, end))
+    return booked
+
+
 def _role_value_for(user_id, perm_key):
     """Gibt 'true' | 'self_only' | 'false' für eine Permission zurück."""
-    if not user_id:
-        return "false"
-    perm = Permission.query.filter_by(key=perm_key).first()
-    user = User.query.get(user_id)
-    if not perm or not user:
-        return "false"
-    rp = RolePermission.query.filter_by(
-        role_id=user.role_id, permission_id=perm.id
-    ).first()
-    return rp.value if rp else "false"
+    return permission_cache.value_for(user_id, perm_key)
 
 
-def _parse_to_utc(val):
-    """Akzeptiert ISO (mit oder ohne Z) und liefert naive UTC-Datetime."""
-    zurich = timezone("Europe/Zurich")
-    try:
-        dt = isoparse(str(val))
-        if dt.tzinfo is None:
-            # lokale Zeit (z. B. "2025-10-14 08:00")
-            dt = zurich.localize(dt)
-        return dt.astimezone(pytz.utc).replace(tzinfo=None)
-
-    except Exception as e:
-        write_log(
-            level="error",
-            message=f"Invalid datetime format in _parse_to_utc: '{val}', error: {e}",
-        )
-        raise ValueError("Ungültiges Zeitformat")
+def _local_iso_to_utc(val):
+    """ISO-String (ohne Zeitzone = Europe/Zurich) → naive UTC-Datetime."""
+    dt = datetime.fromisoformat(str(val).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = timezone("Europe/Zurich").localize(dt)
+    return dt.astimezone(pytz.utc).replace(tzinfo=None)
 
 
-def _purge_old_reservations():
-    now_utc = datetime.utcnow()
-    threshold = now_utc - timedelta(days=90)
-    expired = Reservation.query.filter(Reservation.end_time < threshold).all()
-    if not expired:
-        return 0
-    affected_tool_ids = set(r.tool_id for r in expired)
-    for r in expired:
-        db.session.delete(r)
-    db.session.flush()
-    for tid in affected_tool_ids:
-        _recompute_tool_borrowed(tid)
-    db.session.commit()
-    return len(expired)
+def _qr_window(duration):
+    """Zeitraum einer QR-Ausleihe: ab jetzt bis 23:59 des letzten Tages (UTC)."""
+    now_local = datetime.now(timezone("Europe/Zurich"))
+    end_local = now_local.replace(
+        hour=23, minute=59, second=0, microsecond=0
+    ) + timedelta(days=duration - 1)
+    return (
+        now_local.astimezone(pytz.utc).replace(tzinfo=None),
+        end_local.astimezone(pytz.utc).replace(tzinfo=None),
+    )
 
 
 # -----------------------------
@@ -98,8 +128,6 @@ def create_reservation():
     start_time_str = data.get("start_time")
     end_time_str = data.get("end_time")
 
-    zurich = timezone("Europe/Zurich")
-
     # -------------------------
     # A) Manuelle Reservation
     # -------------------------
@@ -113,14 +141,8 @@ def create_reservation():
             return jsonify({"error": "Keine Berechtigung für Reservation"}), 403
 
         try:
-            start_local = datetime.fromisoformat(start_time_str.replace("Z", "+00:00"))
-            end_local = datetime.fromisoformat(end_time_str.replace("Z", "+00:00"))
-            if start_local.tzinfo is None:
-                start_local = zurich.localize(start_local)
-            if end_local.tzinfo is None:
-                end_local = zurich.localize(end_local)
-            start_utc = start_local.astimezone(pytz.utc).replace(tzinfo=None)
-            end_utc = end_local.astimezone(pytz.utc).replace(tzinfo=None)
+            start_utc = _local_iso_to_utc(start_time_str)
+            end_utc = _local_iso_to_utc(end_time_str)
         except Exception as e:
             write_log("error", f"Invalid manual reservation date: {e}", user_id)
             return jsonify({"error": "Ungültige Datumsangabe"}), 400
@@ -135,11 +157,7 @@ def create_reservation():
             return jsonify({"error": "Benutzer oder Werkzeug nicht gefunden"}), 404
 
         # Überschneidungen prüfen
-        overlap = Reservation.query.filter(
-            Reservation.tool_id == tool.id,
-            Reservation.start_time < end_utc,
-            Reservation.end_time > start_utc,
-        ).first()
+        overlap = _find_overlap(tool.id, start_utc, end_utc)
         if overlap:
             return (
                 jsonify(
@@ -155,6 +173,7 @@ def create_reservation():
         )
         db.session.add(reservation)
         db.session.flush()
+        record_change(reservation)
         now_utc = datetime.utcnow()
         if start_utc <= now_utc <= end_utc:
             tool.is_borrowed = True
@@ -178,35 +197,23 @@ def create_reservation():
         if not str(user_code).startswith("usr"):
             return jsonify({"error": "Nur QR-Scan erlaubt ohne Login"}), 401
 
-    user = User.query.filter_by(qr_code=user_code).first()
+    user = find_user_by_qr(user_code)
     if user:
-        user.last_active = datetime.utcnow()
-        db.session.commit()
+        activity_buffer.touch(user.id)
     if not user:
         user = User(qr_code=user_code, username=user_code)
         db.session.add(user)
 
-    tool = Tool.query.filter_by(qr_code=tool_code).first()
+    tool = find_tool_by_qr(tool_code)
     if not tool:
         tool = Tool(qr_code=tool_code, name=tool_code)
         db.session.add(tool)
         db.session.flush()
 
-    now_local = datetime.now(zurich)
-    start_local = now_local
-    end_local = now_local.replace(
-        hour=23, minute=59, second=0, microsecond=0
-    ) + timedelta(days=duration - 1)
-
-    start_time = start_local.astimezone(pytz.utc).replace(tzinfo=None)
-    end_time = end_local.astimezone(pytz.utc).replace(tzinfo=None)
+    start_time, end_time = _qr_window(duration)
 
     # >>> Konflikte prüfen
-    conflict = Reservation.query.filter(
-        Reservation.tool_id == tool.id,
-        Reservation.start_time < end_time,
-        Reservation.end_time > start_time,
-    ).first()
+    conflict = _find_overlap(tool.id, start_time, end_time)
     if conflict:
         return jsonify({"error": "Werkzeug ist aktuell oder bald reserviert"}), 400
 
@@ -216,6 +223,7 @@ def create_reservation():
     )
     db.session.add(reservation)
     db.session.flush()
+    record_change(reservation)
     now_utc = datetime.utcnow()
     if start_time <= now_utc <= end_time:
         tool.is_borrowed = True
@@ -226,48 +234,354 @@ def create_reservation():
     return jsonify({"message": "Reservation gespeichert"}), 201
 
 
+# -----------------------------
+# Mehrere Werkzeuge in einem Schritt reservieren (Kiosk-Warenkorb)
+# -----------------------------
+@reservation_bp.route("/batch", methods=["POST"])
+def create_reservations_batch():
+    """
+    QR-Modus:     { "user": "usr0001", "tools": ["tool0001", ...], "duration": 1 }
+    Manuell:      { "user_id": 1, "items": [ {"tool_id": 3, "start_time": "...",
+                                              "end_time": "..."}, ... ] }
+    Alle gültigen Positionen werden in einer Transaktion gespeichert; die Antwort
+    enthält ein Ergebnis pro Position. Unbekannte Benutzer/Werkzeuge werden im
+    Gegensatz zum Einzel-Endpoint nicht automatisch angelegt.
+    """
+    data = request.get_json() or {}
+    payload = get_token_payload()
+    user_id = payload["user_id"] if payload else None
+
+    user_code = data.get("user")
+    tool_codes = data.get("tools")
+    items = data.get("items")
+
+    # -------------------------
+    # Positionen normalisieren → (Schlüssel, tool-Bezug, start_utc, end_utc, Fehler)
+    # -------------------------
+    if user_code and isinstance(tool_codes, list) and tool_codes:
+        try:
+            duration = int(data.get("duration") or 0)
+        except (TypeError, ValueError):
+            duration = 0
+        if not duration:
+            return jsonify({"error": "Missing fields"}), 400
+
+        if user_id:
+            if _role_value_for(user_id, "create_reservations") == "false":
+                return jsonify({"error": "Keine Berechtigung für Reservation"}), 403
+        elif not str(user_code).startswith("usr"):
+            return jsonify({"error": "Nur QR-Scan erlaubt ohne Login"}), 401
+
+        user = find_user_by_qr(user_code)
+        if not user:
+            return jsonify({"error": "Benutzer nicht gefunden"}), 404
+
+        start_utc, end_utc = _qr_window(duration)
+        codes = [str(code) for code in tool_codes]
+        keys = [normalize_qr(code) for code in codes]
+        tools = {t.qr_key: t for t in Tool.query.filter(Tool.qr_key.in_(keys))}
+        positions = [
+            (code, tools.get(key), start_utc, end_utc, None)
+            for code, key in zip(codes, keys)
+        ]
+        confirmed = False
+
+    elif data.get("user_id") and isinstance(items, list) and items:
+        if not user_id:
+            return jsonify({"error": "Login erforderlich"}), 401
+        if _role_value_for(user_id, "create_reservations") == "false":
+            return jsonify({"error": "Keine Berechtigung für Reservation"}), 403
+
+        user = User.query.get(data.get("user_id"))
+        if not user:
+            return jsonify({"error": "Benutzer nicht gefunden"}), 404
+
+        parsed = []
+        for it in items:
+            if not isinstance(it, dict):
+                parsed.append((None, None, None, None, "Ungültige Position"))
+                continue
+            key = it.get("tool_id")
+            tool_id = None
+            if key is not None:
+                try:
+                    tool_id = int(key)
+                except (TypeError, ValueError):
+                    parsed.append((key, None, None, None, "Ungültige Werkzeug-ID"))
+                    continue
+            try:
+                start = _local_iso_to_utc(it.get("start_time"))
+                end = _local_iso_to_utc(it.get("end_time"))
+            except Exception:
+                parsed.append((key, None, None, None, "Ungültige Datumsangabe"))
+                continue
+            if start >= end:
+                parsed.append(
+                    (key, None, None, None, "Endzeit muss nach Startzeit liegen")
+                )
+                continue
+            parsed.append((key, tool_id, start, end, None))
+
+        tool_ids = {tool_id for _, tool_id, _, _, _ in parsed if tool_id is not None}
+        tools = {t.id: t for t in Tool.query.filter(Tool.id.in_(tool_ids))}
+        positions = [
+            (key, tools.get(tool_id), start, end, error)
+            for key, tool_id, start, end, error in parsed
+        ]
+        confirmed = True
+
+    else:
+        return jsonify({"error": "Missing fields"}), 400
+
+    # -------------------------
+    # Konflikte prüfen (eine Abfrage + innerhalb des Batches) und anlegen
+    # -------------------------
+    now_utc = datetime.utcnow()
+    results = []
+    created = []
+    booked = _booked_intervals(
+        [(tool.id, start, end) for _, tool, start, end, error in positions if tool]
+    )
+
+    for key, tool, start, end, error in positions:
+        if error:
+            results.append({"tool": key, "status": "error", "error": error})
+            continue
+        if not tool:
+            results.append(
+                {"tool": key, "status": "error", "error": "Werkzeug nicht gefunden"}
+            )
+            continue
+        intervals = booked.setdefault(tool.id, [])
+        if any(s < end and e > start for s, e in intervals):
+            results.append(
+                {
+                    "tool": key,
+                    "status": "error",
+                    "error": f"Werkzeug '{tool.name}' ist in diesem Zeitraum bereits reserviert.",
+                }
+            )
+            continue
+
+        reservation = Reservation(
+            user=user, tool=tool, start_time=start, end_time=end, confirmed=confirmed
+        )
+        db.session.add(reservation)
+        intervals.append((start, end))
+        if start <= now_utc <= end:
+            tool.is_borrowed = True
+        created.append(reservation)
+        results.append({"tool": key, "status": "created", "reservation": reservation})
+
+    if created:
+        activity_buffer.touch(user.id, now_utc)
+        db.session.flush()
+        for reservation in created:
+            record_change(reservation)
+        db.session.commit()
+
+    # Reservation-Objekte erst nach dem Flush durch ihre IDs ersetzen
+    for r in results:
+        if "reservation" in r:
+            r["id"] = r.pop("reservation").id
+
+    return (
+        jsonify({"created": len(created), "results": results}),
+        201 if created else 400,
+    )
+
+
 # -----------------------------
 # Reservationen abfragen
-# → nur aktive/kommende zurückgeben
-# → beim Laden gleichzeitig abgelaufene aufräumen
+# → Aufräumen alter Reservationen läuft als Scheduler-Job (scheduler/tasks.py)
 # -----------------------------
 @reservation_bp.route("", methods=["GET"])
 def get_reservations():
-    _purge_old_reservations()
-
+    """
+    Optionale Query-Parameter:
+      from / to                       → nur Reservationen, die das Fenster berühren
+      tool_id / user_id / category_id → Filter
+      limit / cursor                  → Keyset-Pagination über (start_time, id) absteigend;
+                                        der Cursor der nächsten Seite steht im Header X-Next-Cursor
+    Die aktuelle Revision für /changes steht im Header X-Revision.
+    Ohne Parameter werden (wie bisher) alle Reservationen geliefert.
+    """
     to_zone = timezone("Europe/Zurich")
-    now_utc = datetime.utcnow()
+    # Revision vor den Daten lesen → Client verpasst beim Delta-Sync nichts
+    revision = current_revision()
 
-    reservations = Reservation.query.order_by(Reservation.start_time.desc()).all()
+    # Nur die benötigten Spalten als Zeilen laden (keine ORM-Objekte)
+    query = reservation_query()
 
-    result = []
-    for res in reservations:
-        start_local = res.start_time.replace(tzinfo=pytz.utc).astimezone(to_zone)
-        end_local = res.end_time.replace(tzinfo=pytz.utc).astimezone(to_zone)
-        result.append(
-            {
-                "id": res.id,
-                "start": start_local.strftime("%Y-%m-%d %H:%M"),
-                "end": end_local.strftime("%Y-%m-%d %H:%M"),
-                "note": getattr(res, "note", None),
-                "user": {
-                    "id": res.user.id,
-                    "username": res.user.username,
-                    "first_name": res.user.first_name,
-                    "last_name": res.user.last_name,
-                },
-                "tool": {
-                    "id": res.tool.id,
-                    "name": res.tool.name or res.tool.qr_code,
-                    "qr_code": res.tool.qr_code,
-                },
-            }
+    try:
+        if request.args.get("from"):
+            query = query.filter(
+                Reservation.end_time > parse_to_utc(request.args["from"])
+            )
+        if request.args.get("to"):
+            query = query.filter(
+                Reservation.start_time < parse_to_utc(request.args["to"])
+            )
+    except ValueError:
+        return jsonify({"error": "Ungültiges Zeitfenster"}), 400
+
+    tool_id = request.args.get("tool_id", type=int)
+    user_id = request.args.get("user_id", type=int)
+    category_id = request.args.get("category_id", type=int)
+    if tool_id:
+        query = query.filter(Reservation.tool_id == tool_id)
+    if user_id:
+        query = query.filter(Reservation.user_id == user_id)
+    if category_id:
+        query = query.filter(
+            Reservation.tool_id.in_(
+                db.session.query(Tool.id).filter(Tool.category_id == category_id)
+            )
+        )
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            cursor_start, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Ungültiger Cursor"}), 400
+        query = query.filter(
+            db.or_(
+                Reservation.start_time < cursor_start,
+                db.and_(
+                    Reservation.start_time == cursor_start,
+                    Reservation.id < cursor_id,
+                ),
+            )
         )
-    resp = jsonify(result)
+
+    query = query.order_by(Reservation.start_time.desc(), Reservation.id.desc())
+
+    limit = request.args.get("limit", type=int)
+    if limit:
+        limit = max(1, min(limit, 1000))
+        # Einen Datensatz mehr laden, um zu erkennen, ob es eine nächste Seite gibt
+        reservations = query.limit(limit + 1).all()
+        has_more = len(reservations) > limit
+        reservations = reservations[:limit]
+    else:
+        reservations = query.all()
+        has_more = False
+
+    result = [reservation_to_dict(row, to_zone) for row in reservations]
+    resp = json_response(result)
     resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Revision"] = str(revision)
+    if has_more:
+        last = reservations[-1]
+        resp.headers["X-Next-Cursor"] = encode_cursor(last.start_time, last.id)
     return resp, 200
 
 
+# -----------------------------
+# Delta-Sync: Änderungen seit einer Revision
+# -----------------------------
+@reservation_bp.route("/changes", methods=["GET"])
+def get_reservation_changes():
+    """
+    Liefert nur Änderungen seit `since` (Revision aus X-Revision bzw. "revision"):
+    { "revision": 42, "changes": [ {"op": "upsert", "id": 7, "reservation": {...}},
+                                   {"op": "delete", "id": 8} ] }
+    Ist `since` älter als das aufbewahrte Protokoll → 410, Client lädt alles neu.
+    """
+    since = request.args.get("since", type=int)
+    if since is None or since < 0:
+        return jsonify({"error": "Parameter 'since' ist erforderlich"}), 400
+
+    oldest = db.session.query(db.func.min(ReservationChange.id)).scalar()
+    if since and oldest is not None and since < oldest - 1:
+        return jsonify({"error": "Revision zu alt, bitte vollständig neu laden"}), 410
+
+    changes = (
+        ReservationChange.query.filter(ReservationChange.id > since)
+        .order_by(ReservationChange.id.asc())
+        .all()
+    )
+    if not changes:
+        resp = jsonify({"revision": max(since, current_revision()), "changes": []})
+        resp.headers["Cache-Control"] = "no-store"
+        return resp, 200
+
+    # Pro Reservation zählt nur die letzte Änderung
+    latest = {}
+    for ch in changes:
+        latest[ch.reservation_id] = ch.action
+
+    upsert_ids = [rid for rid, action in latest.items() if action == "upsert"]
+    existing = {}
+    if upsert_ids:
+        rows = reservation_query().filter(Reservation.id.in_(upsert_ids)).all()
+        existing = {row.id: row for row in rows}
+
+    to_zone = timezone("Europe/Zurich")
+    result = []
+    for rid, action in latest.items():
+        res = existing.get(rid) if action == "upsert" else None
+        if res:
+            result.append(
+                {
+                    "op": "upsert",
+                    "id": rid,
+                    "reservation": reservation_to_dict(res, to_zone),
+                }
+            )
+        else:
+            result.append({"op": "delete", "id": rid})
+
+    resp = jsonify({"revision": changes[-1].id, "changes": result})
+    resp.headers["Cache-Control"] = "no-store"
+    return resp, 200
+
+
+# -----------------------------
+# Archiv abfragen (gestreamt als JSON Lines)
+# -----------------------------
+@reservation_bp.route("/archive", methods=["GET"])
+@requires_permission("access_admin_panel")
+def get_reservation_archive():
+    """
+    Query-Parameter (alle optional):
+      from / to          → Startzeit der Reservation im Bereich [from, to)
+      tool_id / user_id  → Filter
+    Antwort: application/x-ndjson, ein Datensatz pro Zeile.
+    """
+    try:
+        start = parse_to_utc(request.args["from"]) if request.args.get("from") else None
+        end = parse_to_utc(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "Ungültiges Zeitfenster"}), 400
+
+    tool_id = request.args.get("tool_id", type=int)
+    user_id = request.args.get("user_id", type=int)
+    start_iso = start.isoformat() if start else None
+    end_iso = end.isoformat() if end else None
+
+    def matches(rec):
+        # ISO-Strings (naive UTC) sind lexikografisch sortierbar
+        if start_iso and rec["start_time"] < start_iso:
+            return False
+        if end_iso and rec["start_time"] >= end_iso:
+            return False
+        if tool_id and rec["tool_id"] != tool_id:
+            return False
+        if user_id and rec["user_id"] != user_id:
+            return False
+        return True
+
+    def generate():
+        for rec in iter_records(RESERVATION_ARCHIVE, start, end, matches):
+            yield json.dumps(rec, ensure_ascii=False) + "\n"
+
+    return Response(
+        stream_with_context(generate()), mimetype="application/x-ndjson"
+    )
+
+
 # -----------------------------
 # Reservation bearbeiten (PATCH)
 # -----------------------------
@@ -289,7 +603,7 @@ def update_reservation(res_id):
 
     if "start_time" in data and data["start_time"]:
         try:
-            new_start = _parse_to_utc(data["start_time"])
+            new_start = parse_to_utc(data["start_time"])
             if new_start and res.start_time != new_start:
                 res.start_time = new_start
                 changed = True
@@ -301,7 +615,7 @@ def update_reservation(res_id):
 
     if "end_time" in data and data["end_time"]:
         try:
-            new_end = _parse_to_utc(data["end_time"])
+            new_end = parse_to_utc(data["end_time"])
             if new_end and res.end_time != new_end:
                 res.end_time = new_end
                 changed = True
@@ -318,12 +632,9 @@ def update_reservation(res_id):
         return jsonify({"message": "Keine Änderungen"}), 200
 
     # Prüfen: Konflikt mit anderen Reservationen für dasselbe Werkzeug?
-    conflict = Reservation.query.filter(
-        Reservation.tool_id == res.tool_id,
-        Reservation.id != res.id,
-        Reservation.start_time < res.end_time,
-        Reservation.end_time > res.start_time,
-    ).first()
+    conflict = _find_overlap(
+        res.tool_id, res.start_time, res.end_time, exclude_id=res.id
+    )
 
     if conflict:
         return (
@@ -333,6 +644,7 @@ def update_reservation(res_id):
 
     # Sonst normal speichern + Tool-Status konsistent
     db.session.flush()
+    record_change(res)
     _recompute_tool_borrowed(res.tool_id)
     db.session.commit()
 
@@ -369,6 +681,7 @@ def delete_reservation(res_id):
         return jsonify({"error": "Nur eigene Reservationen löschbar"}), 403
 
     tool_id = res.tool_id
+    record_change(res, "delete")
     db.session.delete(res)
     db.session.flush()
     _recompute_tool_borrowed(tool_id)
@@ -388,7 +701,7 @@ def return_tool():
     if not tool_code:
         return jsonify({"error": "Missing tool code"}), 400
 
-    tool = Tool.query.filter_by(qr_code=tool_code).first()
+    tool = find_tool_by_qr(tool_code)
     if not tool:
         write_log("error", f"Return failed: Tool '{tool_code}' not found")
         return jsonify({"error": "Tool not found"}), 404
@@ -408,6 +721,7 @@ def return_tool():
         # Rückgabe durchführen
         active_res.end_time = now_utc
         db.session.flush()
+        record_change(active_res)
         _recompute_tool_borrowed(tool.id)
         db.session.commit()
         return (
@@ -1,62 +1,77 @@
 # backend/routes/tools.py
 from flask import Blueprint, request, jsonify, make_response
-from models import (
-    db,
-    Tool,
-    Reservation,
-    User,
-    RolePermission,
-    Permission,
-    ToolCategory,
-)
+from sqlalchemy import delete, exists, update
+from models import db, Tool, ToolCategory, Reservation
 from utils.permissions import (
     requires_permission,
     get_token_payload,
     requires_any_permission,
+    permission_cache,
 )
 from datetime import datetime
 from pytz import timezone
 import pytz
 import csv
+import re
 from io import StringIO, BytesIO
 from utils.logger import write_log
+from utils import tool_search, tool_info
+from utils.qr_lookup import find_tool_by_qr
+from utils.qr_allocator import (
+    allocate_qr_codes,
+    release_qr_codes,
+    reserve_qr_code,
+)
+from utils.revisions import conditional_etag, bump_revisions, TOOLS, CATEGORIES
+from utils.serializers import TOOL_FIELDS, json_response
+from utils.csv_import import (
+    IMPORT_CHUNK_SIZE,
+    bulk_insert,
+    is_dry_run,
+    read_csv_upload,
+)
 
 tools_bp = Blueprint("tools", __name__)
 
+TOOL_STATUSES = ("available", "borrowed", "reserved")
+# Obergrenze pro Massenbearbeitung; IDs werden blockweise gebunden (SQLite)
+MAX_BULK_TOOLS = 10000
+BULK_ID_CHUNK_SIZE = 500
+
 
 # === Öffentliche Tool-Suche/Liste für manuelle Reservation (nur lesen) ===
 @tools_bp.route("/api/tools/public", methods=["GET"])
+@conditional_etag(TOOLS, CATEGORIES)
 def list_tools_public():
     q = (request.args.get("query") or "").strip()
     limit = min(int(request.args.get("limit", 100)), 200)
 
-    query = Tool.query
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            db.or_(
-                Tool.name.ilike(like),
-                Tool.qr_code.ilike(like),
+    try:
+        fields = TOOL_FIELDS.parse_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # FTS5: Präfixsuche über Name, QR-Code und Kategorie, nach Relevanz sortiert.
+    # Ohne Treffer (z. B. Wortteil "mer" in "Hammer") → LIKE-Suche wie bisher
+    ids = tool_search.search_tool_ids(q, limit) if q else None
+    if ids:
+        # Tool.id als Zusatzspalte, um die Relevanz-Reihenfolge wiederherzustellen
+        rows = TOOL_FIELDS.query(fields, Tool.id).filter(Tool.id.in_(ids)).all()
+        by_id = {row[-1]: row for row in rows}
+        rows = [by_id[i] for i in ids if i in by_id]
+    else:
+        query = TOOL_FIELDS.query(fields)
+        if q:
+            like = f"%{q}%"
+            query = query.filter(
+                db.or_(
+                    Tool.name.ilike(like),
+                    Tool.qr_code.ilike(like),
+                )
             )
-        )
+        rows = query.order_by(Tool.name.asc()).limit(limit).all()
 
-    tools = query.order_by(Tool.name.asc()).limit(limit).all()
-
-    return jsonify(
-        [
-            {
-                "id": t.id,
-                "name": t.name,
-                "qr_code": t.qr_code,
-                "category_id": t.category_id,
-                "category_name": t.category_ref.name if t.category_ref else None,
-                "status": t.status,
-                "is_borrowed": t.is_borrowed,
-                "created_at": t.created_at.isoformat() if t.created_at else None,
-            }
-            for t in tools
-        ]
-    )
+    return json_response(TOOL_FIELDS.to_dicts(fields, rows))
 
 
 # === Verfügbare Werkzeuge im Zeitraum (für manuelle Reservation) ===
@@ -78,16 +93,7 @@ def get_available_tools():
         return jsonify({"error": "Authentifizierung erforderlich"}), 401
 
     # Berechtigungsprüfung (create_reservations)
-    perm = Permission.query.filter_by(key="create_reservations").first()
-    user = User.query.get(user_id)
-    if not perm or not user:
-        write_log("error", "Permission lookup failed in available-tools", user_id)
-        return jsonify({"error": "Keine Berechtigung"}), 403
-
-    rp = RolePermission.query.filter_by(
-        role_id=user.role_id, permission_id=perm.id
-    ).first()
-    if not rp or rp.value == "false":
+    if permission_cache.value_for(user_id, "create_reservations") == "false":
         write_log("error", "User lacks create_reservations permission", user_id)
         return jsonify({"error": "Keine Berechtigung für Reservation"}), 403
 
@@ -116,85 +122,46 @@ def get_available_tools():
     if start_utc >= end_utc:
         return jsonify({"error": "Startzeit muss vor Endzeit liegen"}), 400
 
-    # Tools ohne zeitliche Überschneidung mit bestehenden Reservationen
-    subquery = (
-        db.session.query(Reservation.tool_id)
-        .filter(
-            db.and_(
-                Reservation.start_time < end_utc,
-                Reservation.end_time > start_utc,
-            )
-        )
-        .subquery()
-    )
+    try:
+        fields = TOOL_FIELDS.parse_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    available_tools = (
-        Tool.query.filter(~Tool.id.in_(subquery)).order_by(Tool.name.asc()).all()
+    # Tools ohne zeitliche Überschneidung mit bestehenden Reservationen
+    busy = exists().where(
+        Reservation.tool_id == Tool.id,
+        Reservation.start_time < end_utc,
+        Reservation.end_time > start_utc,
     )
+    query = TOOL_FIELDS.query(fields).filter(~busy)
+    rows = query.order_by(Tool.name.asc()).all()
 
-    return jsonify(
-        [
-            {
-                "id": t.id,
-                "name": t.name,
-                "qr_code": t.qr_code,
-                "category_id": t.category_id,
-                "category_name": t.category_ref.name if t.category_ref else None,
-                "status": t.status,
-                "is_borrowed": t.is_borrowed,
-                "created_at": t.created_at.isoformat() if t.created_at else None,
-            }
-            for t in available_tools
-        ]
-    )
+    return json_response(TOOL_FIELDS.to_dicts(fields, rows))
 
 
 # === Alle Tools (ADMIN/SUPERVISOR) ===
 @tools_bp.route("/api/tools", methods=["GET"])
 @requires_permission("manage_tools")
+@conditional_etag(TOOLS, CATEGORIES)
 def list_tools():
-    tools = Tool.query.order_by(Tool.id.asc()).all()
-    return jsonify(
-        [
-            {
-                "id": t.id,
-                "name": t.name,
-                "qr_code": t.qr_code,
-                "category_id": t.category_id,
-                "category_name": t.category_ref.name if t.category_ref else None,
-                "status": t.status,
-                "is_borrowed": t.is_borrowed,
-                "created_at": t.created_at.isoformat() if t.created_at else None,
-            }
-            for t in tools
-        ]
-    )
+    try:
+        fields = TOOL_FIELDS.parse_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = TOOL_FIELDS.query(fields).order_by(Tool.id.asc()).all()
+    return json_response(TOOL_FIELDS.to_dicts(fields, rows))
 
 
 # GET /api/tools/qr/<qr_code> → Werkzeug via QR-Code abrufen (ohne Auth)
 @tools_bp.route("/api/tools/qr/<qr_code>", methods=["GET"])
 def get_tool_by_qr(qr_code):
-    tool = Tool.query.filter(Tool.qr_code.ilike(qr_code)).first()
+    tool = find_tool_by_qr(qr_code)
     if not tool:
         write_log("error", f"Tool not found via QR: {qr_code}")
         return jsonify({"error": "Werkzeug nicht gefunden"}), 404
 
-    return jsonify(
-        {
-            "id": tool.id,
-            "name": tool.name,
-            "qr_code": tool.qr_code,
-            "category_id": tool.category_id,
-            "category_name": tool.category_ref.name if tool.category_ref else None,
-            "status": getattr(tool, "status", None),
-            "is_borrowed": getattr(tool, "is_borrowed", False),
-            "created_at": (
-                tool.created_at.isoformat()
-                if getattr(tool, "created_at", None)
-                else None
-            ),
-        }
-    )
+    return json_response(TOOL_FIELDS.one(tool.id))
 
 
 # === Neues Tool ===
@@ -209,7 +176,7 @@ def create_tool():
     if not name or not qr_code:
         return jsonify({"error": "Name und QR-Code sind Pflichtfelder."}), 400
 
-    if Tool.query.filter_by(qr_code=qr_code).first():
+    if find_tool_by_qr(qr_code):
         write_log("error", f"Duplicate QR in create_tool: {qr_code}")
         return jsonify({"error": "QR-Code existiert bereits."}), 409
 
@@ -223,21 +190,7 @@ def create_tool():
     db.session.add(tool)
     db.session.commit()
 
-    return (
-        jsonify(
-            {
-                "id": tool.id,
-                "name": tool.name,
-                "qr_code": tool.qr_code,
-                "category_id": tool.category_id,
-                "category_name": tool.category_ref.name if tool.category_ref else None,
-                "status": tool.status,
-                "is_borrowed": tool.is_borrowed,
-                "created_at": tool.created_at.isoformat() if tool.created_at else None,
-            }
-        ),
-        201,
-    )
+    return json_response(TOOL_FIELDS.one(tool.id), 201)
 
 
 # === Tool bearbeiten ===
@@ -252,7 +205,8 @@ def update_tool(tool_id):
 
     if "qr_code" in data:
         new_qr = data["qr_code"]
-        if new_qr != tool.qr_code and Tool.query.filter_by(qr_code=new_qr).first():
+        existing = find_tool_by_qr(new_qr)
+        if existing and existing.id != tool.id:
             write_log("error", f"Duplicate QR in update_tool: {new_qr}")
             return jsonify({"error": "QR-Code existiert bereits."}), 409
         tool.qr_code = new_qr
@@ -262,24 +216,18 @@ def update_tool(tool_id):
 
     db.session.commit()
 
-    return jsonify(
-        {
-            "id": tool.id,
-            "name": tool.name,
-            "qr_code": tool.qr_code,
-            "category_id": tool.category_id,
-            "category_name": tool.category_ref.name if tool.category_ref else None,
-            "status": tool.status,
-            "is_borrowed": tool.is_borrowed,
-            "created_at": tool.created_at.isoformat() if tool.created_at else None,
-        }
-    )
+    return json_response(TOOL_FIELDS.one(tool.id))
 
 
 # === Tool löschen ===
 @tools_bp.route("/api/tools/<int:tool_id>", methods=["DELETE"])
 @requires_permission("manage_tools")
 def delete_tool(tool_id):
+    """
+    Löscht ein Werkzeug. Abgelehnt (400) werden wie beim Massenlöschen
+    ausgeliehene Werkzeuge und solche mit Reservationen – Reservationen
+    zuerst löschen oder archivieren lassen.
+    """
     tool = Tool.query.get(tool_id)
     if not tool:
         write_log("error", f"Delete failed: Tool {tool_id} not found")
@@ -294,84 +242,257 @@ def delete_tool(tool_id):
             400,
         )
 
+    # Reservationen würden sonst verwaisen (tool_id NOT NULL → IntegrityError)
+    if db.session.query(exists().where(Reservation.tool_id == tool_id)).scalar():
+        write_log("error", f"Delete failed: Tool {tool_id} has reservations")
+        return (
+            jsonify(
+                {"error": "Werkzeug hat Reservationen und kann nicht gelöscht werden."}
+            ),
+            400,
+        )
+
     db.session.delete(tool)
     db.session.commit()
     return jsonify({"message": "Werkzeug gelöscht"}), 200
 
 
+# === Massenbearbeitung (Ändern/Löschen vieler Tools in einer Transaktion) ===
+def _int_or_error(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Ungültige Auswahl")
+
+
+def _bool_or_error(value):
+    """JSON-Boolean oder "true"/"false" (z. B. aus Formularen)."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValueError("Ungültiger Wert für is_borrowed")
+
+
+def _bulk_selection(data):
+    """
+    Auswahl per `ids` (Liste) oder `filter` (category_id, status, is_borrowed,
+    query). Gibt (angefragte IDs oder None, gefundene IDs) zurück.
+    """
+    ids = data.get("ids")
+    selection = data.get("filter")
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise ValueError("'ids' muss eine Liste sein")
+        requested = list(dict.fromkeys(_int_or_error(i) for i in ids))
+        found = set()
+        for i in range(0, len(requested), BULK_ID_CHUNK_SIZE):
+            chunk = requested[i : i + BULK_ID_CHUNK_SIZE]
+            found.update(
+                tid for (tid,) in db.session.query(Tool.id).filter(Tool.id.in_(chunk))
+            )
+        return requested, [tid for tid in requested if tid in found]
+
+    if not isinstance(selection, dict) or not selection:
+        raise ValueError("'ids' oder 'filter' ist erforderlich")
+    query = db.session.query(Tool.id)
+    if "category_id" in selection:
+        category_id = selection["category_id"]
+        query = query.filter(
+            Tool.category_id.is_(None)
+            if category_id is None
+            else Tool.category_id == _int_or_error(category_id)
+        )
+    if "status" in selection:
+        query = query.filter(Tool.status == selection["status"])
+    if "is_borrowed" in selection:
+        is_borrowed = _bool_or_error(selection["is_borrowed"])
+        query = query.filter(Tool.is_borrowed.is_(is_borrowed))
+    if selection.get("query"):
+        like = f"%{selection['query']}%"
+        query = query.filter(db.or_(Tool.name.ilike(like), Tool.qr_code.ilike(like)))
+    return None, [tid for (tid,) in query.order_by(Tool.id.asc())]
+
+
+def _name_expression(pattern):
+    """Namensmuster mit Platzhaltern {name} / {qr_code} → SQL-Ausdruck."""
+    columns = {"{name}": Tool.name, "{qr_code}": Tool.qr_code}
+    expr = None
+    for part in re.split(r"(\{name\}|\{qr_code\})", pattern):
+        if not part:
+            continue
+        item = columns.get(part, db.literal(part))
+        expr = item if expr is None else expr + item
+    return expr
+
+
+def _bulk_changes(changes):
+    """Validiert `changes` und liefert die Werte für das UPDATE."""
+    if not isinstance(changes, dict) or not changes:
+        raise ValueError("'changes' ist erforderlich")
+    unknown = set(changes) - {"category_id", "status", "name_pattern"}
+    if unknown:
+        raise ValueError(f"Unbekannte Felder: {', '.join(sorted(unknown))}")
+
+    values = {}
+    if "category_id" in changes:
+        category_id = changes["category_id"]
+        if category_id is not None:
+            category_id = _int_or_error(category_id)
+            if not db.session.get(ToolCategory, category_id):
+                raise ValueError("Kategorie existiert nicht")
+        values["category_id"] = category_id
+    if "status" in changes:
+        if changes["status"] not in TOOL_STATUSES:
+            raise ValueError(f"Ungültiger Status: '{changes['status']}'")
+        values["status"] = changes["status"]
+    if "name_pattern" in changes:
+        pattern = str(changes["name_pattern"] or "").strip()
+        if not pattern:
+            raise ValueError("Namensmuster darf nicht leer sein")
+        values["name"] = _name_expression(pattern)
+    return values
+
+
+@tools_bp.route("/api/tools/bulk", methods=["POST"])
+@requires_permission("manage_tools")
+def bulk_tools():
+    """
+    Body (JSON):
+      action  → "update" oder "delete"
+      ids     → Liste von Tool-IDs  ODER  filter → {category_id, status, is_borrowed, query}
+      changes → nur bei update: {category_id, status, name_pattern}
+                name_pattern mit Platzhaltern, z. B. "{name} (alt)"
+    Alles in einer Transaktion; ausgeliehene oder reservierte Tools werden
+    nicht gelöscht. Mit ?dry_run=1 wird nur der Bericht erstellt.
+    """
+    data = request.get_json() or {}
+    action = data.get("action")
+    if action not in ("update", "delete"):
+        return jsonify({"error": "Aktion muss 'update' oder 'delete' sein"}), 400
+
+    try:
+        requested, found = _bulk_selection(data)
+        values = _bulk_changes(data.get("changes")) if action == "update" else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if len(found) > MAX_BULK_TOOLS:
+        return (
+            jsonify({"error": f"Maximal {MAX_BULK_TOOLS} Werkzeuge pro Aufruf"}),
+            400,
+        )
+
+    dry_run = is_dry_run()
+    errors = {}
+    if requested is not None:
+        found_set = set(found)
+        for tid in requested:
+            if tid not in found_set:
+                errors[tid] = "Werkzeug nicht gefunden"
+
+    targets = found
+    if action == "delete":
+        # Eine Abfrage pro ID-Block: ausgeliehen oder mit Reservationen
+        blocked = {}
+        for i in range(0, len(found), BULK_ID_CHUNK_SIZE):
+            chunk = found[i : i + BULK_ID_CHUNK_SIZE]
+            has_res = exists().where(Reservation.tool_id == Tool.id)
+            rows = db.session.query(Tool.id, Tool.is_borrowed, has_res).filter(
+                Tool.id.in_(chunk), db.or_(Tool.is_borrowed.is_(True), has_res)
+            )
+            for tid, is_borrowed, reserved in rows:
+                blocked[tid] = (
+                    "Werkzeug ist ausgeliehen und kann nicht gelöscht werden."
+                    if is_borrowed
+                    else "Werkzeug hat Reservationen und kann nicht gelöscht werden."
+                )
+        errors.update(blocked)
+        targets = [tid for tid in found if tid not in blocked]
+
+    if targets and not dry_run:
+        codes = []
+        for i in range(0, len(targets), BULK_ID_CHUNK_SIZE):
+            chunk = targets[i : i + BULK_ID_CHUNK_SIZE]
+            if action == "update":
+                db.session.execute(
+                    update(Tool)
+                    .where(Tool.id.in_(chunk))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+            else:
+                codes += [
+                    code
+                    for (code,) in db.session.query(Tool.qr_code).filter(
+                        Tool.id.in_(chunk)
+                    )
+                ]
+                db.session.execute(
+                    delete(Tool)
+                    .where(Tool.id.in_(chunk))
+                    .execution_options(synchronize_session=False)
+                )
+        if codes:
+            release_qr_codes("tool", codes)
+        bump_revisions(TOOLS)
+        db.session.commit()
+        # Core-Statements laufen an den Session-Events vorbei
+        db.session.expire_all()
+        for tid in targets:
+            tool_info.tool_info_cache.discard(tid)
+
+    if errors and not dry_run:
+        write_log(
+            "error",
+            f"Bulk {action} of tools: {len(errors)} of "
+            f"{len(errors) + len(targets)} failed",
+        )
+
+    done = "updated" if action == "update" else "deleted"
+    order = requested if requested is not None else found
+    results = [
+        (
+            {"id": tid, "status": "error", "error": errors[tid]}
+            if tid in errors
+            else {"id": tid, "status": done}
+        )
+        for tid in order
+    ]
+    return (
+        jsonify(
+            {
+                done: len(targets),
+                "failed": len(errors),
+                "results": results,
+                "dry_run": dry_run,
+            }
+        ),
+        200,
+    )
+
+
 # === Nächste freie tool-ID ===
 @tools_bp.route("/api/tools/next-id", methods=["GET"])
 @requires_permission("manage_tools")
 def next_tool_qr():
-    tools = Tool.query.all()
-    nums = []
-    for t in tools:
-        if t.qr_code and t.qr_code.startswith("tool"):
-            try:
-                nums.append(int(t.qr_code.replace("tool", "")))
-            except ValueError:
-                pass
-    n = 1
-    while n in nums:
-        n += 1
-    return jsonify({"next_qr": f"tool{n:04d}"})
-
-
-# Werkzeug-Info + nächste Reservationen abrufen (z. B. bei "tool zuerst gescannt")
+    # Nummer wird für das Formular reserviert (parallel arbeitende Admins)
+    return jsonify({"next_qr": reserve_qr_code("tool")})
+
+
+# Werkzeug-Info + nächste Reservationen abrufen (z. B. bei "tool zuerst gescannt")
 @tools_bp.route("/api/tools/info/<qr_code>", methods=["GET"])
 def get_tool_info(qr_code):
-    tool = Tool.query.filter(Tool.qr_code.ilike(qr_code)).first()
-    if not tool:
+    # Eine Abfrage (Tool + aktive/kommende Reservationen), kurz gecacht pro Tool
+    info = tool_info.get_tool_info(qr_code)
+    if info is None:
         return jsonify({"error": "Werkzeug nicht gefunden"}), 404
-
-    now_utc = datetime.utcnow()
-    zurich = timezone("Europe/Zurich")
-
-    # Aktive Reservation (falls jetzt ausgeliehen)
-    active = (
-        Reservation.query.filter_by(tool_id=tool.id)
-        .filter(Reservation.start_time <= now_utc)
-        .filter(Reservation.end_time >= now_utc)
-        .order_by(Reservation.start_time.asc())
-        .first()
-    )
-
-    # Kommende Reservationen (max. 2)
-    upcoming = (
-        Reservation.query.filter_by(tool_id=tool.id)
-        .filter(Reservation.start_time > now_utc)
-        .order_by(Reservation.start_time.asc())
-        .limit(2)
-        .all()
-    )
-
-    def res_to_dict(res):
-        start_local = res.start_time.replace(tzinfo=pytz.utc).astimezone(zurich)
-        end_local = res.end_time.replace(tzinfo=pytz.utc).astimezone(zurich)
-        return {
-            "user": {
-                "first_name": res.user.first_name,
-                "last_name": res.user.last_name,
-            },
-            "start": start_local.strftime("%Y-%m-%d %H:%M"),
-            "end": end_local.strftime("%Y-%m-%d %H:%M"),
-        }
-
-    return jsonify(
-        {
-            "tool": {
-                "name": tool.name,
-                "qr_code": tool.qr_code,
-                "is_borrowed": tool.is_borrowed,
-            },
-            "active_reservation": res_to_dict(active) if active else None,
-            "upcoming_reservations": [res_to_dict(r) for r in upcoming],
-        }
-    )
+    return json_response(info)
 
 
 @tools_bp.route("/api/categories", methods=["GET"])
 @requires_any_permission("access_admin_panel", "manage_tools")
+@conditional_etag(CATEGORIES)
 def list_categories():
 
     categories = ToolCategory.query.order_by(ToolCategory.name.asc()).all()
@@ -465,6 +586,11 @@ def export_tool_csv_template():
 @tools_bp.route("/api/tools/import", methods=["POST"])
 @requires_permission("manage_tools")
 def import_tools_csv():
+    """
+    CSV-Import (Name;Kategorie), zeilenweise gelesen und blockweise eingefügt.
+    Mit ?dry_run=1 wird nur geprüft; der Bericht ist derselbe, es wird aber
+    nichts gespeichert.
+    """
     if "file" not in request.files:
         return jsonify({"error": "Keine Datei hochgeladen"}), 400
 
@@ -472,35 +598,28 @@ def import_tools_csv():
     if not file.filename.endswith(".csv"):
         return jsonify({"error": "Bitte eine .csv-Datei hochladen"}), 400
 
-    stream = file.stream.read().decode("utf-8-sig")  # UTF-8 mit BOM
-    lines = stream.splitlines()
-
-    reader = csv.reader(lines, delimiter=";")
+    dry_run = is_dry_run()
+    reader = read_csv_upload(file)
     skipped = []
     errors = []
     imported_count = 0
     header_found = False
 
-    tools_existing = {t.name.lower() for t in Tool.query.all()}
-    categories = {c.name: c.id for c in ToolCategory.query.all()}
+    # Kompakte Indizes: nur die benötigten Spalten laden
+    tools_existing = {name.lower() for (name,) in db.session.query(Tool.name)}
+    categories = dict(db.session.query(ToolCategory.name, ToolCategory.id))
 
-    # QR-Code Logik vorbereiten
-    used_qrs = {
-        int(t.qr_code.replace("tool", ""))
-        for t in Tool.query.all()
-        if t.qr_code.startswith("tool") and t.qr_code.replace("tool", "").isdigit()
-    }
-    next_qr_num = 1
+    pending = []
 
-    def next_qr():
-        nonlocal next_qr_num
-        while next_qr_num in used_qrs:
-            next_qr_num += 1
-        used_qrs.add(next_qr_num)
-        return f"tool{next_qr_num:04d}"
+    def insert_pending():
+        codes = allocate_qr_codes("tool", len(pending))
+        for row, qr_code in zip(pending, codes):
+            row["qr_code"] = qr_code
+        bulk_insert(Tool, pending)
+        pending.clear()
 
-    for idx, row in enumerate(reader):
-        line_num = idx + 1
+    for row in reader:
+        line_num = reader.line_num
 
         # Kommentarzeile oder leer → überspringen
         if not row or row[0].startswith("#"):
@@ -533,9 +652,11 @@ def import_tools_csv():
 
         if name.lower() in tools_existing:
             skipped.append({"row": line_num, "reason": "Name bereits vorhanden"})
-            write_log(
-                "error", f"Tool name duplicate in CSV import: '{name}' (row {line_num})"
-            )
+            if not dry_run:
+                write_log(
+                    "error",
+                    f"Tool name duplicate in CSV import: '{name}' (row {line_num})",
+                )
             continue
 
         category_id = categories.get(category_name)
@@ -543,29 +664,44 @@ def import_tools_csv():
             errors.append(
                 {"row": line_num, "reason": f"Ungültige Kategorie: '{category_name}'"}
             )
-            write_log(
-                "error",
-                f"Invalid category in CSV import: '{category_name}' (row {line_num})",
-            )
+            if not dry_run:
+                write_log(
+                    "error",
+                    f"Invalid category in CSV import: '{category_name}' (row {line_num})",
+                )
             continue
 
-        # Werkzeug anlegen
-        tool = Tool(
-            name=name,
-            qr_code=next_qr(),
-            category_id=category_id,
-            status="available",
-            is_borrowed=False,
-        )
-        db.session.add(tool)
         tools_existing.add(name.lower())
         imported_count += 1
+        if dry_run:
+            continue
 
+        # Werkzeug vormerken, eingefügt wird blockweise (executemany)
+        pending.append(
+            {
+                "name": name,
+                "category_id": category_id,
+                "status": "available",
+                "is_borrowed": False,
+            }
+        )
+        if len(pending) >= IMPORT_CHUNK_SIZE:
+            insert_pending()
+
+    if pending:
+        insert_pending()
+    if imported_count and not dry_run:
+        bump_revisions(TOOLS)
     db.session.commit()
 
     return (
         jsonify(
-            {"imported_count": imported_count, "skipped": skipped, "errors": errors}
+            {
+                "imported_count": imported_count,
+                "skipped": skipped,
+                "errors": errors,
+                "dry_run": dry_run,
+            }
         ),
         200,
     )
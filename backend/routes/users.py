@@ -5,12 +5,25 @@ from utils.permissions import (
     requires_permission,
     get_token_payload,
     requires_any_permission,
+    invalidate_permissions,
 )
 from werkzeug.security import generate_password_hash
 import csv
 from io import StringIO, BytesIO
-from datetime import datetime
 from utils.logger import write_log
+from utils.activity import activity_buffer
+from utils.qr_lookup import find_user_by_qr
+from utils.qr_allocator import allocate_qr_codes, reserve_qr_code
+from utils.csv_import import IMPORT_CHUNK_SIZE, bulk_insert, read_csv_upload
+from utils.password_pool import HASH_BATCH_SIZE, submit_hashes
+from utils.serializers import USER_FIELDS, json_response
+from utils.revisions import (
+    conditional_etag,
+    bump_revisions,
+    USERS,
+    COMPANIES,
+    ROLES,
+)
 
 users_bp = Blueprint("users", __name__)
 
@@ -18,38 +31,26 @@ users_bp = Blueprint("users", __name__)
 # GET all users
 @users_bp.route("/api/users", methods=["GET"])
 @requires_permission("manage_users")
+@conditional_etag(USERS, COMPANIES, ROLES)
 def get_users():
-    users = User.query.all()
-    return jsonify(
-        [
-            {
-                "id": u.id,
-                "username": u.username,
-                "first_name": u.first_name,
-                "last_name": u.last_name,
-                "company_id": u.company_id,
-                "company_name": u.company_ref.name if u.company_ref else None,
-                "qr_code": u.qr_code,
-                "role": u.role.name,
-                "created_at": u.created_at.isoformat() if u.created_at else None,
-                "last_login": u.last_login.isoformat() if u.last_login else None,
-                "last_active": u.last_active.isoformat() if u.last_active else None,
-            }
-            for u in users
-        ]
-    )
+    try:
+        fields = USER_FIELDS.parse_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = USER_FIELDS.query(fields).order_by(User.id.asc()).all()
+    return json_response(USER_FIELDS.to_dicts(fields, rows))
 
 
 # GET /api/users/qr/<qr_code> → Benutzer via QR-Code abrufen (ohne Auth)
 @users_bp.route("/api/users/qr/<qr_code>", methods=["GET"])
 def get_user_by_qr(qr_code):
-    user = User.query.filter(User.qr_code.ilike(qr_code)).first()
+    user = find_user_by_qr(qr_code)
     if not user:
         write_log("error", f"User not found via QR: {qr_code}")
         return jsonify({"error": "Benutzer nicht gefunden"}), 404
 
-    user.last_active = datetime.utcnow()
-    db.session.commit()
+    activity_buffer.touch(user.id)
 
     return jsonify(
         {
@@ -81,6 +82,10 @@ def create_user():
         write_log("error", f"Duplicate username in create_user: {username}")
         return jsonify({"error": "Benutzername existiert bereits"}), 409
 
+    if find_user_by_qr(qr_code):
+        write_log("error", f"Duplicate QR in create_user: {qr_code}")
+        return jsonify({"error": "QR-Code existiert bereits"}), 409
+
     role = Role.query.filter_by(name=role_name).first()
     if not role:
         write_log("error", f"Invalid role in create_user: {role_name}")
@@ -100,26 +105,7 @@ def create_user():
     db.session.add(user)
     db.session.commit()
 
-    return (
-        jsonify(
-            {
-                "id": user.id,
-                "username": user.username,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "company_id": user.company_id,
-                "company_name": user.company_ref.name if user.company_ref else None,
-                "qr_code": user.qr_code,
-                "role": role.name,
-                "last_login": user.last_login.isoformat() if user.last_login else None,
-                "last_active": (
-                    user.last_active.isoformat() if user.last_active else None
-                ),
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-            }
-        ),
-        201,
-    )
+    return json_response(USER_FIELDS.one(user.id), 201)
 
 
 # PATCH existing user
@@ -146,32 +132,24 @@ def update_user(user_id):
         user.password = generate_password_hash(data["password"])
 
     if "qr_code" in data:
-        user.qr_code = data["qr_code"]
+        new_qr = data["qr_code"]
+        existing = find_user_by_qr(new_qr)
+        if existing and existing.id != user.id:
+            write_log("error", f"Duplicate QR in update_user: {new_qr}")
+            return jsonify({"error": "QR-Code existiert bereits"}), 409
+        user.qr_code = new_qr
 
     if "role" in data:
         role = Role.query.filter_by(name=data["role"]).first()
         if not role:
             write_log("error", f"Invalid role in update_user: {data['role']}")
-        else:
+        elif user.role_id != role.id:
             user.role_id = role.id
+            invalidate_permissions()
 
     db.session.commit()
 
-    return jsonify(
-        {
-            "id": user.id,
-            "username": user.username,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "company_id": user.company_id,
-            "company_name": user.company_ref.name if user.company_ref else None,
-            "qr_code": user.qr_code,
-            "role": user.role.name,
-            "last_login": user.last_login.isoformat() if user.last_login else None,
-            "last_active": user.last_active.isoformat() if user.last_active else None,
-            "created_at": user.created_at.isoformat() if user.created_at else None,
-        }
-    )
+    return json_response(USER_FIELDS.one(user.id))
 
 
 # DELETE user (mit Schutz vor Selbstlöschung)
@@ -205,6 +183,7 @@ def delete_user(user_id):
         )
 
     db.session.delete(user)
+    invalidate_permissions()
     db.session.commit()
     return jsonify({"message": "Benutzer gelöscht"}), 200
 
@@ -212,6 +191,7 @@ def delete_user(user_id):
 # GET roles for dropdown
 @users_bp.route("/api/roles", methods=["GET"])
 @requires_permission("manage_users")
+@conditional_etag(ROLES)
 def get_roles():
     roles = Role.query.all()
     return jsonify([{"id": r.id, "name": r.name} for r in roles])
@@ -221,28 +201,14 @@ def get_roles():
 @users_bp.route("/api/users/next-id", methods=["GET"])
 @requires_permission("manage_users")
 def get_next_user_qr():
-    users = User.query.all()
-    qr_codes = [u.qr_code for u in users if u.qr_code and u.qr_code.startswith("usr")]
-
-    used_numbers = []
-    for qr in qr_codes:
-        try:
-            number = int(qr.replace("usr", ""))
-            used_numbers.append(number)
-        except ValueError:
-            continue
-
-    next_num = 1
-    while next_num in used_numbers:
-        next_num += 1
-
-    next_qr = f"usr{next_num:04d}"
-    return jsonify({"next_qr": next_qr})
+    # Nummer wird für das Formular reserviert (parallel arbeitende Admins)
+    return jsonify({"next_qr": reserve_qr_code("user")})
 
 
 # Company routes
 @users_bp.route("/api/companies", methods=["GET"])
 @requires_any_permission("access_admin_panel", "manage_users")
+@conditional_etag(COMPANIES)
 def list_companies():
     companies = Company.query.order_by(Company.name.asc()).all()
     return jsonify([c.serialize() for c in companies])
@@ -335,9 +301,24 @@ def export_user_csv_template():
     return response
 
 
+def _insert_users(rows):
+    """Fügt importierte Benutzer mit neu vergebenen QR-Codes blockweise ein."""
+    if not rows:
+        return
+    codes = allocate_qr_codes("user", len(rows))
+    for row, qr_code in zip(rows, codes):
+        row["qr_code"] = qr_code
+    bulk_insert(User, rows)
+
+
 @users_bp.route("/api/users/import", methods=["POST"])
 @requires_permission("manage_users")
 def import_users_csv():
+    """
+    CSV-Import (Benutzername;Vorname;Nachname;Firma;Rolle;Passwort).
+    Passwörter werden parallel zur Validierung in einem Pool gehasht,
+    die Benutzer danach blockweise eingefügt.
+    """
     if "file" not in request.files:
         return jsonify({"error": "Keine Datei hochgeladen"}), 400
 
@@ -345,9 +326,7 @@ def import_users_csv():
     if not file.filename.endswith(".csv"):
         return jsonify({"error": "Bitte eine .csv-Datei hochladen"}), 400
 
-    stream = file.stream.read().decode("utf-8-sig")
-    lines = stream.splitlines()
-    reader = csv.reader(lines, delimiter=";")
+    reader = read_csv_upload(file)
 
     header_found = False
     imported_count = 0
@@ -355,27 +334,24 @@ def import_users_csv():
     errors = []
 
     # Bestehende Daten aus DB
-    existing_usernames = {u.username.lower() for u in User.query.all()}
-    companies = {c.name: c.id for c in Company.query.all()}
-    roles = {r.name: r.id for r in Role.query.all()}
-
-    # QR‑Code Nummern vorbereiten
-    used_qrs = {
-        int(u.qr_code.replace("usr", ""))
-        for u in User.query.all()
-        if u.qr_code.startswith("usr") and u.qr_code.replace("usr", "").isdigit()
+    existing_usernames = {
+        name.lower() for (name,) in db.session.query(User.username)
     }
-    next_qr_num = 1
+    companies = dict(db.session.query(Company.name, Company.id))
+    roles = dict(db.session.query(Role.name, Role.id))
 
-    def next_qr():
-        nonlocal next_qr_num
-        while next_qr_num in used_qrs:
-            next_qr_num += 1
-        used_qrs.add(next_qr_num)
-        return f"usr{next_qr_num:04d}"
+    # Gültige Zeilen, deren Passwörter gesammelt werden
+    batch_rows, batch_passwords = [], []
+    # (Future mit Hashes, Zeilen) – das Hashing läuft während der Validierung
+    hashing = []
 
-    for idx, row in enumerate(reader):
-        line_num = idx + 1
+    def submit_batch():
+        hashing.append((submit_hashes(batch_passwords), list(batch_rows)))
+        batch_rows.clear()
+        batch_passwords.clear()
+
+    for row in reader:
+        line_num = reader.line_num
         if not row or row[0].startswith("#"):
             continue
 
@@ -458,21 +434,38 @@ def import_users_csv():
             )
             continue
 
-        # Benutzer anlegen
-        new_user = User(
-            username=username,
-            first_name=first_name or None,
-            last_name=last_name or None,
-            company_id=company_id,
-            password=generate_password_hash(password),
-            qr_code=next_qr(),
-            role_id=role_id,
-        )
-
-        db.session.add(new_user)
         existing_usernames.add(username.lower())
         imported_count += 1
 
+        # Benutzer vormerken, das Passwort wird im Pool gehasht
+        batch_rows.append(
+            {
+                "username": username,
+                "first_name": first_name or None,
+                "last_name": last_name or None,
+                "company_id": company_id,
+                "role_id": role_id,
+            }
+        )
+        batch_passwords.append(password)
+        if len(batch_rows) >= HASH_BATCH_SIZE:
+            submit_batch()
+
+    if batch_rows:
+        submit_batch()
+
+    # Hashes einsammeln und blockweise einfügen (executemany)
+    pending = []
+    for future, rows in hashing:
+        for row, password_hash in zip(rows, future.result()):
+            row["password"] = password_hash
+            pending.append(row)
+        if len(pending) >= IMPORT_CHUNK_SIZE:
+            _insert_users(pending)
+            pending = []
+    _insert_users(pending)
+    if imported_count:
+        bump_revisions(USERS)
     db.session.commit()
 
     return (
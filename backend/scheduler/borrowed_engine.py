@@ -0,0 +1,144 @@
+# backend/scheduler/borrowed_engine.py
+import heapq
+from datetime import datetime, timedelta
+from threading import Lock
+import pytz
+from sqlalchemy import event
+from models import db, Reservation
+from utils.logger import write_log
+from utils.borrowed import recompute_borrowed
+
+JOB_ID = "borrowed_transition"
+
+# Reservationen sind bis inkl. end_time aktiv → Rückgabe erst danach prüfen
+END_GRACE = timedelta(seconds=1)
+
+
+class BorrowedStatusEngine:
+    """
+    Ereignisgesteuerte Pflege von Tool.is_borrowed.
+
+    Hält einen Min-Heap aller kommenden Start-/End-Zeitpunkte von Reservationen
+    und plant im APScheduler genau einen einmaligen Job für den nächsten
+    Zeitpunkt. Fällige Tools werden mit einem set-basierten UPDATE neu gesetzt.
+    Veraltete Heap-Einträge (gelöschte/geänderte Reservationen) sind harmlos,
+    da die Neuberechnung idempotent ist.
+    """
+
+    def __init__(self):
+        self._heap = []  # [(zeitpunkt_utc, tool_id), ...]
+        self._lock = Lock()
+        self._scheduled_at = None
+        self._app = None
+        self._scheduler = None
+
+    def init_app(self, app, scheduler):
+        self._app = app
+        self._scheduler = scheduler
+
+    # -----------------------------
+    # Heap pflegen
+    # -----------------------------
+    def _push(self, tool_id, start, end, now):
+        if start > now:
+            heapq.heappush(self._heap, (start, tool_id))
+        if end + END_GRACE > now:
+            heapq.heappush(self._heap, (end + END_GRACE, tool_id))
+
+    def rebuild(self):
+        """Lädt alle kommenden Übergänge neu (App-Kontext erforderlich)."""
+        now = datetime.utcnow()
+        rows = (
+            db.session.query(
+                Reservation.tool_id, Reservation.start_time, Reservation.end_time
+            )
+            .filter(Reservation.end_time >= now)
+            .all()
+        )
+        with self._lock:
+            self._heap = []
+            for tool_id, start, end in rows:
+                self._push(tool_id, start, end, now)
+            self._scheduled_at = None
+        self._schedule_next()
+
+    def add_reservation(self, tool_id, start, end):
+        now = datetime.utcnow()
+        with self._lock:
+            self._push(tool_id, start, end, now)
+        self._schedule_next()
+
+    # -----------------------------
+    # Scheduling
+    # -----------------------------
+    def _schedule_next(self):
+        if not self._scheduler:
+            return
+        with self._lock:
+            if not self._heap:
+                return
+            next_at = self._heap[0][0]
+            if self._scheduled_at and self._scheduled_at <= next_at:
+                return
+            self._scheduled_at = next_at
+
+        # Nie in der Vergangenheit planen (sonst verwirft APScheduler den Job)
+        run_at = max(next_at, datetime.utcnow() + timedelta(milliseconds=100))
+        self._scheduler.add_job(
+            id=JOB_ID,
+            func=self._run,
+            trigger="date",
+            run_date=run_at.replace(tzinfo=pytz.utc),
+            replace_existing=True,
+        )
+
+    def _run(self):
+        with self._app.app_context():
+            try:
+                now = datetime.utcnow()
+                due = set()
+                with self._lock:
+                    self._scheduled_at = None
+                    while self._heap and self._heap[0][0] <= now:
+                        due.add(heapq.heappop(self._heap)[1])
+                if due:
+                    self.apply(due, now)
+            except Exception as e:
+                write_log("error", f"Scheduler error (borrowed engine): {repr(e)}")
+            finally:
+                self._schedule_next()
+
+    @staticmethod
+    def apply(tool_ids, now=None):
+        """Setzt is_borrowed für die angegebenen Tools set-basiert neu."""
+        recompute_borrowed(tool_ids, now)
+        db.session.commit()
+
+
+borrowed_engine = BorrowedStatusEngine()
+
+
+# -----------------------------
+# Neue/geänderte Reservationen nach dem Commit einplanen
+# -----------------------------
+_PENDING_KEY = "borrowed_engine_ops"
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_transitions(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Reservation):
+            session.info.setdefault(_PENDING_KEY, []).append(
+                (obj.tool_id, obj.start_time, obj.end_time)
+            )
+
+
+@event.listens_for(db.session, "after_commit")
+def _schedule_transitions(session):
+    for tool_id, start, end in session.info.pop(_PENDING_KEY, None) or []:
+        borrowed_engine.add_reservation(tool_id, start, end)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_transitions(session):
+    session.info.pop(_PENDING_KEY, None)
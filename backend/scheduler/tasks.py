@@ -1,50 +1,173 @@
-from datetime import datetime
-from models import db, Tool, Reservation
-from sqlalchemy import and_
-from routes.reservations import _recompute_tool_borrowed
+import os
+from datetime import datetime, timedelta
+from models import db, Tool, Reservation, ReservationChange, User, Log
+from sqlalchemy import delete, insert
+from routes.reservations import RESERVATION_ARCHIVE
+from routes.logs import LOG_ARCHIVE
+from utils.archive import append_records
+from utils.borrowed import recompute_borrowed
+from utils.change_log import trim_change_log
+
+# Reservationen, die länger als so viele Tage vorbei sind, werden archiviert
+RESERVATION_RETENTION_DAYS = 90
+# Max. Anzahl Zeilen pro Lösch-Transaktion (hält den SQLite-Schreib-Lock kurz)
+PURGE_CHUNK_SIZE = 500
+
+
+# Aufbewahrung im Live-Log pro action in Tagen ("*" = alle übrigen).
+# Überschreibbar per .env, z. B. LOG_RETENTION="error=30,purge=365,*=180"
+DEFAULT_LOG_RETENTION = {"error": 30, "*": 180}
+LOG_CHUNK_SIZE = 1000
+
+
+def _log_retention():
+    retention = dict(DEFAULT_LOG_RETENTION)
+    for part in (os.getenv("LOG_RETENTION") or "").split(","):
+        action, _, days = part.partition("=")
+        if action.strip() and days.strip().isdigit():
+            retention[action.strip()] = int(days)
+    return retention
 
 
 def reset_expired_borrowed_tools():
-    now = datetime.utcnow()
-    all_tools = Tool.query.all()
-    for tool in all_tools:
-        active = Reservation.query.filter(
-            Reservation.tool_id == tool.id,
-            Reservation.start_time <= now,
-            Reservation.end_time >= now,
-        ).first()
-        tool.is_borrowed = bool(active)
+    recompute_borrowed()
     db.session.commit()
 
 
-def sync_borrowed_status_fast():
+def purge_old_reservations(chunk_size=PURGE_CHUNK_SIZE):
     """
-    Kombinierter Job:
-    - Setzt is_borrowed = True für Tools mit aktiver Reservation
-    - Setzt is_borrowed = False für Tools mit abgelaufener Reservation
-    Wird z. B. alle 30 Sekunden ausgeführt
+    Verschiebt abgelaufene Reservationen blockweise ins komprimierte Archiv
+    (utils/archive.py) und löscht sie danach set-basiert aus der DB (ein Commit
+    pro Block). Für jede gelöschte Zeile wird ein Tombstone ins
+    Änderungsprotokoll geschrieben. Gibt die Anzahl verschobener Zeilen zurück.
+
+    Das Archiv wird vor dem Commit geschrieben: bricht der Job dazwischen ab,
+    kann ein Block beim nächsten Lauf ein zweites Mal archiviert werden.
     """
     now = datetime.utcnow()
+    threshold = now - timedelta(days=RESERVATION_RETENTION_DAYS)
+    removed = 0
 
-    # 1. Aktive Reservationen → Tools auf borrowed = True setzen
-    active_reservations = Reservation.query.filter(
-        Reservation.start_time <= now,
-        Reservation.end_time >= now,
-    ).all()
-    active_tool_ids = set(r.tool_id for r in active_reservations)
+    while True:
+        rows = (
+            db.session.query(
+                Reservation.id,
+                Reservation.user_id,
+                Reservation.tool_id,
+                Reservation.start_time,
+                Reservation.end_time,
+                Reservation.confirmed,
+                Reservation.note,
+                Reservation.created_at,
+                User.username,
+                User.first_name,
+                User.last_name,
+                Tool.name.label("tool_name"),
+                Tool.qr_code.label("tool_qr_code"),
+            )
+            .outerjoin(User, User.id == Reservation.user_id)
+            .outerjoin(Tool, Tool.id == Reservation.tool_id)
+            .filter(Reservation.end_time < threshold)
+            .order_by(Reservation.id.asc())
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
 
-    # 2. Alle Tools holen, die aktuell borrowed=True sind
-    borrowed_tools = Tool.query.filter_by(is_borrowed=True).all()
+        # Benutzer-/Werkzeugnamen mitarchivieren, da diese später gelöscht werden können
+        append_records(
+            RESERVATION_ARCHIVE,
+            [dict(r._mapping) for r in rows],
+            time_field="start_time",
+        )
 
-    # 3. Borrowed-Wert neu setzen
-    for tool in borrowed_tools:
-        # Falls Werkzeug *nicht mehr aktiv* → zurücksetzen
-        if tool.id not in active_tool_ids:
-            tool.is_borrowed = False
+        ids = [r.id for r in rows]
+        db.session.execute(
+            insert(ReservationChange),
+            [
+                {
+                    "reservation_id": r.id,
+                    "tool_id": r.tool_id,
+                    "action": "delete",
+                    "changed_at": now,
+                }
+                for r in rows
+            ],
+        )
+        db.session.execute(
+            delete(Reservation)
+            .where(Reservation.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        recompute_borrowed({r.tool_id for r in rows})
+        db.session.commit()
+        removed += len(rows)
 
-    for tid in active_tool_ids:
-        tool = Tool.query.get(tid)
-        if tool:
-            tool.is_borrowed = True
+        if len(rows) < chunk_size:
+            break
 
+    trim_change_log(now)
     db.session.commit()
+
+    return removed
+
+
+def purge_old_logs(chunk_size=LOG_CHUNK_SIZE):
+    """
+    Verschiebt Log-Einträge, die älter als ihre Aufbewahrungsfrist sind, blockweise
+    ins komprimierte Monatsarchiv und löscht sie danach aus der DB.
+    Gibt die Anzahl verschobener Einträge zurück.
+    """
+    now = datetime.utcnow()
+    retention = _log_retention()
+    specific = [action for action in retention if action != "*"]
+
+    # (Filter für action, Stichtag) pro Regel
+    rules = [
+        (Log.action == action, now - timedelta(days=retention[action]))
+        for action in specific
+    ]
+    if "*" in retention:
+        rules.append(
+            (Log.action.not_in(specific), now - timedelta(days=retention["*"]))
+        )
+
+    removed = 0
+    for action_filter, threshold in rules:
+        while True:
+            rows = (
+                db.session.query(
+                    Log.id,
+                    Log.user_id,
+                    User.username,
+                    Log.action,
+                    Log.details,
+                    Log.timestamp,
+                    Log.count,
+                    Log.first_seen,
+                )
+                .outerjoin(User, User.id == Log.user_id)
+                .filter(action_filter, Log.timestamp < threshold)
+                .order_by(Log.id.asc())
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            append_records(
+                LOG_ARCHIVE, [dict(r._mapping) for r in rows], time_field="timestamp"
+            )
+            db.session.execute(
+                delete(Log)
+                .where(Log.id.in_([r.id for r in rows]))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            removed += len(rows)
+
+            if len(rows) < chunk_size:
+                break
+
+    return removed
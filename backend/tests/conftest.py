@@ -0,0 +1,67 @@
+# backend/tests/conftest.py
+# Test-App mit In-Memory-SQLite: nur die benötigten Blueprints, ohne Scheduler
+# und ohne die Datenbank in instance/ anzufassen.
+import os
+import sys
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, Role, Permission, RolePermission, User  # noqa: E402
+from routes.reservations import reservation_bp  # noqa: E402
+from routes.logs import logs_bp  # noqa: E402
+from routes.tools import tools_bp  # noqa: E402
+from routes.users import users_bp  # noqa: E402
+import routes.reservations as reservations  # noqa: E402
+import utils.permissions as permissions  # noqa: E402
+
+# Alle Rechte, die der Test-Admin erhält
+PERMISSIONS = (
+    "access_admin_panel",
+    "manage_tools",
+    "manage_users",
+    "create_reservations",
+    "edit_reservations",
+)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite://")
+    db.init_app(app)
+    app.register_blueprint(reservation_bp, url_prefix="/api/reservations")
+    app.register_blueprint(logs_bp)
+    app.register_blueprint(tools_bp)
+    app.register_blueprint(users_bp)
+
+    with app.app_context():
+        db.create_all()
+        role = Role(name="admin")
+        perms = [Permission(key=k) for k in PERMISSIONS]
+        db.session.add(role)
+        db.session.add_all(perms)
+        db.session.flush()
+        db.session.add_all(
+            RolePermission(role_id=role.id, permission_id=p.id, value="true")
+            for p in perms
+        )
+        db.session.add(
+            User(
+                id=1, username="admin", password="x", qr_code="usr0001", role_id=role.id
+            )
+        )
+        db.session.commit()
+        permissions.permission_cache.invalidate()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    """Test-Client, angemeldet als Admin (Token-Prüfung umgangen)."""
+    for module in (permissions, reservations):
+        monkeypatch.setattr(module, "get_token_payload", lambda: {"user_id": 1})
+    return app.test_client()
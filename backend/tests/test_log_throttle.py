@@ -0,0 +1,37 @@
+# backend/tests/test_log_throttle.py
+import pytest
+import utils.log_throttle as throttle_mod
+from utils.log_throttle import LogThrottle
+
+
+@pytest.fixture
+def written(monkeypatch):
+    rows = []
+
+    def fake_write_log(action, details=None, user_id=None, **kwargs):
+        rows.append(dict(kwargs, action=action, details=details, user_id=user_id))
+
+    monkeypatch.setattr(throttle_mod, "write_log", fake_write_log)
+    monkeypatch.setattr(throttle_mod, "resolve_log_user_id", lambda uid=None: uid)
+    return rows
+
+
+def test_burst_is_one_row_per_window(written):
+    throttle = LogThrottle()
+    for _ in range(5):
+        throttle.log("error", "404 Not Found: /api/x", source="kiosk")
+    assert written == []
+
+    throttle.flush(force=True)
+    assert len(written) == 1
+    row = written[0]
+    assert row["count"] == 5
+    assert row["first_seen"] <= row["timestamp"]
+
+
+def test_single_event_is_written_once(written):
+    throttle = LogThrottle()
+    throttle.log("error", "einmalig", source="kiosk")
+    throttle.flush(force=True)
+    throttle.flush(force=True)
+    assert [row["count"] for row in written] == [1]
@@ -0,0 +1,49 @@
+# backend/tests/test_qr_allocator.py
+# Vergabe neuer QR-Codes über next-id (Marke, Reservationen, Freigabe).
+from datetime import datetime, timedelta
+from models import db, QrReservation
+
+
+def _next(client):
+    resp = client.get("/api/tools/next-id")
+    assert resp.status_code == 200
+    return resp.get_json()["next_qr"]
+
+
+def _create(client, code):
+    resp = client.post("/api/tools", json={"name": "Bohrer", "qr_code": code})
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+
+def test_next_id_reservations_do_not_collide(client):
+    assert [_next(client) for _ in range(3)] == ["tool0001", "tool0002", "tool0003"]
+
+    # Verwendete Reservation wird aufgelöst, die übrigen bleiben
+    _create(client, "tool0002")
+    with client.application.app_context():
+        assert sorted(n for (n,) in db.session.query(QrReservation.number)) == [1, 3]
+    assert _next(client) == "tool0004"
+
+
+def test_expired_reservation_is_reused(client):
+    assert _next(client) == "tool0001"
+    assert _next(client) == "tool0002"
+    with client.application.app_context():
+        QrReservation.query.filter_by(number=1).update(
+            {"expires_at": datetime.utcnow() - timedelta(minutes=1)}
+        )
+        db.session.commit()
+    assert _next(client) == "tool0001"
+
+
+def test_deleted_tools_lower_the_mark(client):
+    ids = [_create(client, f"tool{n:04d}") for n in (1, 2, 3)]
+    assert _next(client) == "tool0004"
+
+    assert client.delete(f"/api/tools/{ids[1]}").status_code == 200
+    assert _next(client) == "tool0002"
+
+    resp = client.post("/api/tools/bulk", json={"action": "delete", "ids": [ids[0]]})
+    assert resp.status_code == 200
+    assert _next(client) == "tool0001"
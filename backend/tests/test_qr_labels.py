@@ -0,0 +1,28 @@
+# backend/tests/test_qr_labels.py
+import pytest
+from utils import qr_labels
+
+pytestmark = pytest.mark.skipif(
+    not qr_labels.labels_available(), reason="qrcode/Pillow fehlen"
+)
+
+
+def test_label_images_in_order_and_cached(tmp_path):
+    labels = [(f"TOOL{i:04d}", f"Werkzeug {i}") for i in range(40)]
+    labels.append(labels[0])  # Duplikat
+
+    images = qr_labels.LabelImages(labels, str(tmp_path))
+    assert (images.cached, images.rendered) == (0, 40)
+    first = [img.tobytes() for img in images]
+    assert len(first) == 41 and first[0] == first[-1]
+
+    again = qr_labels.LabelImages(labels, str(tmp_path))
+    assert (again.cached, again.rendered) == (40, 0)
+    assert [img.tobytes() for img in again] == first
+
+
+def test_pdf_has_one_page_per_sheet(tmp_path):
+    labels = [(f"TOOL{i:04d}", "Bohrer") for i in range(qr_labels.LABELS_PER_PAGE + 1)]
+    pdf = b"".join(qr_labels.iter_pdf(qr_labels.LabelImages(labels, str(tmp_path))))
+    assert pdf.startswith(b"%PDF-1.4") and pdf.endswith(b"%%EOF\n")
+    assert b"/Count 2 " in pdf
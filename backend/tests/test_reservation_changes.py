@@ -0,0 +1,103 @@
+# backend/tests/test_reservation_changes.py
+# Delta-Sync über /api/reservations/changes inkl. Tombstones und 410.
+from datetime import datetime, timedelta
+import pytest
+from models import db, Tool, Reservation, ReservationChange
+from scheduler.tasks import purge_old_reservations, RESERVATION_RETENTION_DAYS
+from utils.change_log import CHANGE_LOG_DAYS, trim_change_log
+
+
+@pytest.fixture
+def tool(app):
+    with app.app_context():
+        db.session.add(Tool(id=1, name="Bohrer", qr_code="TOOL0001"))
+        db.session.commit()
+
+
+def _create(client, start, end):
+    resp = client.post(
+        "/api/reservations",
+        json={"user_id": 1, "tool_id": 1, "start_time": start, "end_time": end},
+    )
+    assert resp.status_code == 201
+    return resp
+
+
+def _revision(client):
+    return int(client.get("/api/reservations").headers["X-Revision"])
+
+
+def _changes(client, since):
+    resp = client.get(f"/api/reservations/changes?since={since}")
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def test_create_change_delete(client, tool):
+    since = _revision(client)
+    _create(client, "2026-03-02T08:00", "2026-03-02T10:00")
+    data = _changes(client, since)
+    assert [c["op"] for c in data["changes"]] == ["upsert"]
+    res_id = data["changes"][0]["id"]
+    assert data["changes"][0]["reservation"]["start"] == "2026-03-02 08:00"
+
+    since = data["revision"]
+    assert _changes(client, since) == {"revision": since, "changes": []}
+
+    resp = client.patch(
+        f"/api/reservations/{res_id}", json={"end_time": "2026-03-02T12:00"}
+    )
+    assert resp.status_code == 200
+    data = _changes(client, since)
+    assert data["changes"][0]["reservation"]["end"] == "2026-03-02 12:00"
+
+    since = data["revision"]
+    assert client.delete(f"/api/reservations/{res_id}").status_code == 200
+    data = _changes(client, since)
+    assert data["changes"] == [{"op": "delete", "id": res_id}]
+    assert data["revision"] == _revision(client)
+
+
+def test_purge_writes_tombstones(app, client, tool, tmp_path):
+    app.instance_path = str(tmp_path)
+    old_end = datetime.utcnow() - timedelta(days=RESERVATION_RETENTION_DAYS + 1)
+    with app.app_context():
+        res = Reservation(
+            user_id=1,
+            tool_id=1,
+            start_time=old_end - timedelta(hours=2),
+            end_time=old_end,
+        )
+        db.session.add(res)
+        db.session.commit()
+        res_id = res.id
+    since = _revision(client)
+
+    with app.app_context():
+        assert purge_old_reservations() == 1
+
+    data = _changes(client, since)
+    assert data["changes"] == [{"op": "delete", "id": res_id}]
+
+
+def test_expired_since_returns_410(app, client, tool):
+    _create(client, "2026-03-02T08:00", "2026-03-02T10:00")
+    _create(client, "2026-03-03T08:00", "2026-03-03T10:00")
+    _create(client, "2026-03-04T08:00", "2026-03-04T10:00")
+    first = 1
+    latest = _revision(client)
+
+    # Alle Einträge ausser dem neuesten altern lassen und aufräumen
+    with app.app_context():
+        ReservationChange.query.filter(ReservationChange.id < latest).update(
+            {"changed_at": datetime.utcnow() - timedelta(days=CHANGE_LOG_DAYS + 1)}
+        )
+        trim_change_log(datetime.utcnow())
+        db.session.commit()
+        assert db.session.query(ReservationChange.id).all() == [(latest,)]
+
+    resp = client.get(f"/api/reservations/changes?since={first}")
+    assert resp.status_code == 410
+
+    # Wer den vorletzten Stand kennt, bekommt noch die letzte Änderung
+    assert len(_changes(client, latest - 1)["changes"]) == 1
@@ -0,0 +1,99 @@
+# backend/tests/test_reservations_batch.py
+from datetime import datetime
+import pytest
+from sqlalchemy import event
+from models import db, Tool, Reservation
+
+
+@pytest.fixture
+def tools(app):
+    with app.app_context():
+        db.session.add_all(
+            [
+                Tool(id=1, name="Bohrer", qr_code="TOOL0001"),
+                Tool(id=2, name="Säge", qr_code="TOOL0002"),
+            ]
+        )
+        # Bohrer: 5. Januar 2026, 10:00–11:00 Ortszeit (09:00–10:00 UTC)
+        db.session.add(
+            Reservation(
+                user_id=1,
+                tool_id=1,
+                start_time=datetime(2026, 1, 5, 9),
+                end_time=datetime(2026, 1, 5, 10),
+            )
+        )
+        db.session.commit()
+
+
+def _item(tool_id, start, end):
+    return {
+        "tool_id": tool_id,
+        "start_time": f"2026-01-05T{start}",
+        "end_time": f"2026-01-05T{end}",
+    }
+
+
+def test_batch_checks_conflicts_in_one_query(client, tools):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        # Konfliktabfragen erkennt man am Überschneidungsfilter
+        if "reservation.end_time >" in statement:
+            statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        resp = client.post(
+            "/api/reservations/batch",
+            json={
+                "user_id": 1,
+                "items": [
+                    _item(1, "10:30", "11:30"),  # überschneidet bestehende
+                    _item(1, "11:00", "12:00"),  # schliesst direkt an
+                    _item(2, "11:00", "12:00"),  # frei
+                    _item(2, "11:30", "12:30"),  # überschneidet Position 3
+                ],
+            },
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert resp.status_code == 201
+    statuses = [r["status"] for r in resp.get_json()["results"]]
+    assert statuses == ["error", "created", "created", "error"]
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize("tool_id", [[1], {"a": 1}, "x"])
+def test_batch_invalid_tool_id_is_item_error(client, tools, tool_id):
+    resp = client.post(
+        "/api/reservations/batch",
+        json={
+            "user_id": 1,
+            "items": [_item(tool_id, "14:00", "15:00"), _item(2, "14:00", "15:00")],
+        },
+    )
+    assert resp.status_code == 201
+    results = resp.get_json()["results"]
+    assert results[0] == {
+        "tool": tool_id,
+        "status": "error",
+        "error": "Ungültige Werkzeug-ID",
+    }
+    assert results[1]["status"] == "created"
+
+
+def test_batch_missing_tool_id(client, tools):
+    resp = client.post(
+        "/api/reservations/batch",
+        json={
+            "user_id": 1,
+            "items": [
+                {"start_time": "2026-01-05T14:00", "end_time": "2026-01-05T15:00"}
+            ],
+        },
+    )
+    assert resp.status_code == 400
+    assert resp.get_json()["results"][0]["error"] == "Werkzeug nicht gefunden"
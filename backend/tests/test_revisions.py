@@ -0,0 +1,31 @@
+# backend/tests/test_revisions.py
+# Bedingte GETs: If-None-Match → 304, nach einer Änderung neues ETag.
+
+
+def test_tools_etag_304_and_change_after_write(client):
+    first = client.get("/api/tools")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    resp = client.get("/api/tools", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.get_data() == b""
+
+    resp = client.post("/api/tools", json={"name": "Bohrer", "qr_code": "TOOL0001"})
+    assert resp.status_code == 201
+
+    resp = client.get("/api/tools", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    assert [t["name"] for t in resp.get_json()] == ["Bohrer"]
+
+
+def test_users_etag_changes_after_update(client):
+    etag = client.get("/api/users").headers["ETag"]
+    resp = client.patch("/api/users/1", json={"first_name": "Chef"})
+    assert resp.status_code == 200
+
+    resp = client.get("/api/users", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
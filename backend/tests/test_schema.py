@@ -0,0 +1,40 @@
+# backend/tests/test_schema.py
+import pytest
+from sqlalchemy import inspect, text
+from models import db
+import utils.schema as schema
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    messages = []
+    monkeypatch.setattr(
+        schema, "write_log", lambda action, details=None, **kw: messages.append(details)
+    )
+    return messages
+
+
+def test_duplicate_qr_keys_skip_index_only(app, logged):
+    """Alte DB mit QR-Codes, die sich nur in der Schreibweise unterscheiden."""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_tool_qr_key"))
+            conn.execute(text("DROP INDEX ix_log_timestamp"))
+            conn.execute(text("ALTER TABLE log DROP COLUMN first_seen"))
+            conn.execute(
+                text(
+                    "INSERT INTO tool (name, qr_code) "
+                    "VALUES ('A', 'tool0001'), ('B', 'TOOL0001')"
+                )
+            )
+
+        schema.ensure_schema()
+
+        inspector = inspect(db.engine)
+        columns = {c["name"] for c in inspector.get_columns("log")}
+        indexes = {i["name"] for i in inspector.get_indexes("tool")}
+        assert "first_seen" in columns
+        assert inspector.has_index("log", "ix_log_timestamp")
+        assert "ix_tool_qr_key" not in indexes
+        assert len(logged) == 1
+        assert "ix_tool_qr_key" in logged[0] and "tool0001 (2×)" in logged[0]
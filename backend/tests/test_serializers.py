@@ -0,0 +1,25 @@
+# backend/tests/test_serializers.py
+from datetime import datetime
+import pytz
+from models import db, Reservation
+from utils.serializers import reservation_query, reservation_to_dict
+
+
+def test_reservation_without_tool_is_listed(app):
+    """Fehlendes Werkzeug (z. B. Altdaten ohne FK-Prüfung) → Zeile bleibt."""
+    with app.app_context():
+        db.session.add(
+            Reservation(
+                user_id=1,
+                tool_id=999,
+                start_time=datetime(2026, 1, 5, 8),
+                end_time=datetime(2026, 1, 5, 10),
+            )
+        )
+        db.session.commit()
+
+        rows = reservation_query().all()
+        assert len(rows) == 1
+        data = reservation_to_dict(rows[0], pytz.utc)
+        assert data["user"]["username"] == "admin"
+        assert data["tool"] == {"id": 999, "name": None, "qr_code": None}
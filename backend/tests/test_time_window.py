@@ -0,0 +1,54 @@
+# backend/tests/test_time_window.py
+# Ungültige Zeitangaben (from/to) → 400 statt 500.
+import pytest
+from datetime import datetime
+import utils.dates as dates
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    """Ersetzt write_log durch eine Attrappe mit derselben Signatur."""
+    calls = []
+
+    def fake_write_log(action, details=None, user_id=None, **kwargs):
+        calls.append((action, details))
+
+    monkeypatch.setattr(dates, "write_log", fake_write_log)
+    return calls
+
+
+def test_parse_to_utc_local_time(app):
+    # Winterzeit Zürich = UTC+1
+    assert dates.parse_to_utc("2025-01-10T08:00") == datetime(
+        2025, 1, 10, 7, 0
+    )
+
+
+def test_parse_to_utc_invalid_raises_value_error(app, logged):
+    with pytest.raises(ValueError):
+        dates.parse_to_utc("garbage")
+    assert logged and logged[0][0] == "error"
+
+
+@pytest.mark.parametrize("param", ["from", "to"])
+def test_reservations_invalid_window(client, logged, param):
+    resp = client.get(f"/api/reservations?{param}=garbage")
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("param", ["from", "to"])
+def test_reservation_archive_invalid_window(client, logged, param):
+    resp = client.get(f"/api/reservations/archive?{param}=garbage")
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("param", ["from", "to"])
+def test_logs_invalid_window(client, logged, param):
+    resp = client.get(f"/api/logs?{param}=garbage")
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("param", ["from", "to"])
+def test_log_archive_invalid_window(client, logged, param):
+    resp = client.get(f"/api/logs/archive?{param}=garbage")
+    assert resp.status_code == 400
@@ -0,0 +1,85 @@
+# backend/tests/test_tool_info.py
+# Werkzeug-Info für den Scan-Kiosk: Cache pro Tool und Invalidierung.
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import text
+from models import db, Tool
+from utils.qr_lookup import qr_cache
+from utils.tool_info import tool_info_cache, TOOL_INFO_TTL
+
+
+@pytest.fixture
+def tool(app):
+    tool_info_cache.clear()
+    qr_cache.clear()
+    with app.app_context():
+        db.session.add(Tool(id=1, name="Bohrer", qr_code="TOOL0001"))
+        db.session.commit()
+    yield 1
+    tool_info_cache.clear()
+    qr_cache.clear()
+
+
+def _info(client, code="tool0001"):
+    return client.get(f"/api/tools/info/{code}")
+
+
+def _insert_raw(app, start, end):
+    """Reservation ohne ORM-Events (wie ein anderer Worker-Prozess)."""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO reservation (user_id, tool_id, start_time, end_time) "
+                    "VALUES (1, 1, :start, :end)"
+                ),
+                {"start": start, "end": end},
+            )
+
+
+def test_new_reservation_visible_after_invalidation(app, client, tool):
+    assert _info(client).get_json()["upcoming_reservations"] == []
+
+    # Ohne Session-Events bleibt der Cache-Eintrag bis zum Ablauf stehen
+    now = datetime.utcnow()
+    _insert_raw(app, now + timedelta(days=1), now + timedelta(days=1, hours=1))
+    assert _info(client).get_json()["upcoming_reservations"] == []
+
+    resp = client.post(
+        "/api/reservations",
+        json={
+            "user_id": 1,
+            "tool_id": 1,
+            "start_time": "2099-01-05T08:00",
+            "end_time": "2099-01-05T10:00",
+        },
+    )
+    assert resp.status_code == 201
+    upcoming = _info(client).get_json()["upcoming_reservations"]
+    assert [r["start"] for r in upcoming][-1] == "2099-01-05 08:00"
+    assert len(upcoming) == 2
+
+
+def test_entry_expires_at_ttl_or_next_start(app, client, tool):
+    before = datetime.utcnow()
+    _info(client)
+    _, expires, _ = tool_info_cache._entries[tool]
+    assert before + TOOL_INFO_TTL <= expires <= datetime.utcnow() + TOOL_INFO_TTL
+
+    # Beginnt die nächste Reservation früher, verfällt der Eintrag dann
+    start = datetime.utcnow() + timedelta(seconds=3)
+    _insert_raw(app, start, start + timedelta(hours=1))
+    tool_info_cache.clear()
+    _info(client)
+    assert tool_info_cache._entries[tool][1] == start
+    assert tool_info_cache.get(tool, "tool0001", start) is None
+
+
+def test_tool_update_and_delete_discard_entry(client, tool):
+    assert _info(client).get_json()["tool"]["name"] == "Bohrer"
+
+    assert client.patch("/api/tools/1", json={"name": "Akkubohrer"}).status_code == 200
+    assert _info(client).get_json()["tool"]["name"] == "Akkubohrer"
+
+    assert client.delete("/api/tools/1").status_code == 200
+    assert _info(client).status_code == 404
@@ -0,0 +1,53 @@
+# backend/tests/test_tool_search.py
+import pytest
+from models import db, Tool
+from utils import tool_search
+
+
+@pytest.fixture
+def tools(app, monkeypatch):
+    monkeypatch.setattr(tool_search, "_available", False)
+    with app.app_context():
+        assert tool_search.ensure_tool_search()
+        db.session.add_all(
+            [
+                Tool(name="Hammer", qr_code="TOOL0001"),
+                Tool(name="Bohrmaschine", qr_code="TOOL0002"),
+            ]
+        )
+        db.session.commit()
+
+
+def _names(client, query):
+    resp = client.get("/api/tools/public", query_string={"query": query})
+    assert resp.status_code == 200
+    return [t["name"] for t in resp.get_json()]
+
+
+def test_prefix_and_qr_number(client, tools):
+    assert _names(client, "ham") == ["Hammer"]
+    assert _names(client, "2") == ["Bohrmaschine"]
+
+
+def test_word_part_falls_back_to_like(client, tools):
+    assert _names(client, "mer") == ["Hammer"]
+    assert _names(client, "maschine") == ["Bohrmaschine"]
+    assert _names(client, "zange") == []
+
+
+def test_search_after_bulk_rename(client, tools):
+    resp = client.post(
+        "/api/tools/bulk",
+        json={
+            "action": "update",
+            "filter": {"query": "Hammer"},
+            "changes": {"name_pattern": "Schlosserhammer {qr_code}"},
+        },
+    )
+    assert resp.status_code == 200
+    assert _names(client, "schlosser") == ["Schlosserhammer TOOL0001"]
+    # Trigger halten den Index synchron (Treffer kommt aus FTS, nicht LIKE)
+    with client.application.app_context():
+        assert len(tool_search.search_tool_ids("schlosser", 10)) == 1
+        assert tool_search.search_tool_ids("hammer", 10) == []
+    assert _names(client, "tool0001") == ["Schlosserhammer TOOL0001"]
@@ -0,0 +1,40 @@
+# backend/tests/test_tools.py
+from datetime import datetime
+from models import db, Tool, Reservation
+
+
+def _tool(app, with_reservation):
+    with app.app_context():
+        tool = Tool(name="Bohrer", qr_code="TOOL0001")
+        db.session.add(tool)
+        db.session.flush()
+        if with_reservation:
+            db.session.add(
+                Reservation(
+                    user_id=1,
+                    tool_id=tool.id,
+                    start_time=datetime(2026, 1, 5, 8),
+                    end_time=datetime(2026, 1, 5, 10),
+                )
+            )
+        db.session.commit()
+        return tool.id
+
+
+def test_delete_tool(app, client):
+    tool_id = _tool(app, with_reservation=False)
+    assert client.delete(f"/api/tools/{tool_id}").status_code == 200
+    with app.app_context():
+        assert db.session.get(Tool, tool_id) is None
+
+
+def test_delete_tool_with_reservations_is_refused(app, client):
+    tool_id = _tool(app, with_reservation=True)
+    resp = client.delete(f"/api/tools/{tool_id}")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == (
+        "Werkzeug hat Reservationen und kann nicht gelöscht werden."
+    )
+    with app.app_context():
+        assert db.session.get(Tool, tool_id) is not None
+        assert Reservation.query.filter_by(tool_id=tool_id).count() == 1
@@ -0,0 +1,71 @@
+# backend/tests/test_tools_bulk.py
+from datetime import datetime
+import pytest
+from models import db, Tool, Reservation
+
+
+@pytest.fixture
+def tools(app):
+    with app.app_context():
+        db.session.add_all(
+            [
+                Tool(name="Bohrer", qr_code="TOOL0001", is_borrowed=True),
+                Tool(name="Säge", qr_code="TOOL0002", is_borrowed=False),
+            ]
+        )
+        db.session.commit()
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(False, ["Säge"]), ("false", ["Säge"]), (True, ["Bohrer"]), ("TRUE", ["Bohrer"])],
+)
+def test_bulk_filter_is_borrowed(client, tools, value, expected):
+    resp = client.post(
+        "/api/tools/bulk?dry_run=1",
+        json={
+            "action": "update",
+            "filter": {"is_borrowed": value},
+            "changes": {"status": "available"},
+        },
+    )
+    assert resp.status_code == 200
+    ids = [r["id"] for r in resp.get_json()["results"]]
+    with client.application.app_context():
+        names = [db.session.get(Tool, i).name for i in ids]
+    assert names == expected
+
+
+@pytest.mark.parametrize("value", ["nein", 0, None, "1"])
+def test_bulk_filter_invalid_is_borrowed(client, tools, value):
+    resp = client.post(
+        "/api/tools/bulk",
+        json={"action": "delete", "filter": {"is_borrowed": value}},
+    )
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Ungültiger Wert für is_borrowed"
+
+
+def test_single_and_bulk_delete_refuse_reserved_tool(client, tools):
+    with client.application.app_context():
+        tool = Tool.query.filter_by(name="Säge").one()
+        tool_id = tool.id
+        db.session.add(
+            Reservation(
+                user_id=1,
+                tool_id=tool_id,
+                start_time=datetime(2026, 1, 5, 8),
+                end_time=datetime(2026, 1, 5, 10),
+            )
+        )
+        db.session.commit()
+
+    message = "Werkzeug hat Reservationen und kann nicht gelöscht werden."
+    resp = client.delete(f"/api/tools/{tool_id}")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == message
+
+    resp = client.post("/api/tools/bulk", json={"action": "delete", "ids": [tool_id]})
+    assert resp.get_json()["results"] == [
+        {"id": tool_id, "status": "error", "error": message}
+    ]
@@ -0,0 +1,36 @@
+# backend/tests/test_users.py
+import pytest
+from models import db, User
+
+
+@pytest.fixture
+def second_user(app):
+    with app.app_context():
+        user = User(username="max", password="x", qr_code="usr0002", role_id=1)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def test_create_user_rejects_qr_variant(client):
+    resp = client.post(
+        "/api/users",
+        json={
+            "username": "neu",
+            "password": "geheim",
+            "qr_code": " USR0001 ",
+            "role": "admin",
+        },
+    )
+    assert resp.status_code == 409
+    assert resp.get_json()["error"] == "QR-Code existiert bereits"
+
+
+def test_update_user_rejects_qr_of_other_user(client, second_user):
+    resp = client.patch(f"/api/users/{second_user}", json={"qr_code": "Usr0001"})
+    assert resp.status_code == 409
+
+    # Eigener Code in anderer Schreibweise ist erlaubt
+    resp = client.patch(f"/api/users/{second_user}", json={"qr_code": "USR0002"})
+    assert resp.status_code == 200
+    assert resp.get_json()["qr_code"] == "USR0002"
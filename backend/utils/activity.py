@@ -0,0 +1,96 @@
+# backend/utils/activity.py
+import atexit
+from datetime import datetime, timedelta
+from threading import Lock
+from sqlalchemy import bindparam, or_
+from models import db, User
+from utils.revisions import bump_revisions, USERS
+
+JOB_ID = "flush_last_active"
+FLUSH_INTERVAL_SECONDS = 5
+# last_active wird pro Benutzer höchstens so oft fortgeschrieben (die Admin-
+# Ansicht zeigt Tage) – hält auch das ETag von GET /api/users stabil
+RESOLUTION = timedelta(seconds=60)
+
+
+class ActivityBuffer:
+    """
+    Write-Behind-Puffer für User.last_active.
+
+    Requests merken sich nur den Zeitpunkt im Speicher; ein Scheduler-Job
+    schreibt alle gesammelten Werte periodisch mit einem einzigen
+    (executemany-)UPDATE, ausserdem beim Beenden des Prozesses.
+    So nehmen lesende Requests nie den SQLite-Schreib-Lock.
+    """
+
+    def __init__(self):
+        self._pending = {}  # user_id -> datetime (UTC, naiv)
+        self._lock = Lock()
+        self._app = None
+
+    def init_app(self, app, scheduler):
+        self._app = app
+        scheduler.add_job(
+            id=JOB_ID,
+            func=self._job_flush,
+            trigger="interval",
+            seconds=FLUSH_INTERVAL_SECONDS,
+        )
+        atexit.register(self._job_flush)
+
+    def touch(self, user_id, when=None):
+        if not user_id:
+            return
+        when = when or datetime.utcnow()
+        with self._lock:
+            last = self._pending.get(user_id)
+            if not last or when > last:
+                self._pending[user_id] = when
+
+    def flush(self):
+        """Schreibt alle gepufferten Werte (App-Kontext erforderlich)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        table = User.__table__
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("b_id"))
+            .where(
+                or_(
+                    table.c.last_active.is_(None),
+                    table.c.last_active < bindparam("b_min"),
+                )
+            )
+            .values(last_active=bindparam("b_ts"))
+        )
+        try:
+            result = db.session.execute(
+                stmt,
+                [
+                    {"b_id": uid, "b_ts": ts, "b_min": ts - RESOLUTION}
+                    for uid, ts in pending.items()
+                ],
+            )
+            # last_active ist Teil von GET /api/users
+            if result.rowcount:
+                bump_revisions(USERS)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Werte nicht verlieren → beim nächsten Lauf erneut versuchen
+            for uid, ts in pending.items():
+                self.touch(uid, ts)
+            raise
+        return len(pending)
+
+    def _job_flush(self):
+        if not self._app:
+            return
+        with self._app.app_context():
+            self.flush()
+
+
+activity_buffer = ActivityBuffer()
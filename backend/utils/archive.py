@@ -0,0 +1,86 @@
+# backend/utils/archive.py
+# Append-only Archiv als gzip-komprimierte JSONL-Dateien, partitioniert nach Monat:
+#
+#     instance/archive/<kind>/<YYYY-MM>.jsonl.gz
+#
+# Jeder Schreibvorgang hängt ein eigenes gzip-Member an (gzip liest mehrere
+# Member als einen Stream), bestehende Daten werden nie umgeschrieben.
+import gzip
+import json
+import os
+from datetime import datetime
+from flask import current_app
+
+
+def _archive_dir(kind):
+    path = os.path.join(current_app.instance_path, "archive", kind)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _partition_path(kind, month):
+    return os.path.join(_archive_dir(kind), f"{month}.jsonl.gz")
+
+
+def _month_of(dt):
+    return dt.strftime("%Y-%m")
+
+
+def _json_default(val):
+    if isinstance(val, datetime):
+        return val.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(val)!r}")
+
+
+def append_records(kind, records, time_field):
+    """
+    Hängt Datensätze (dicts) an die Monatsdateien an, partitioniert nach
+    `time_field` (naive UTC-Datetime). Gibt die Anzahl geschriebener Zeilen zurück.
+    """
+    by_month = {}
+    for rec in records:
+        by_month.setdefault(_month_of(rec[time_field]), []).append(rec)
+
+    for month, recs in by_month.items():
+        lines = "".join(
+            json.dumps(r, default=_json_default, ensure_ascii=False) + "\n"
+            for r in recs
+        )
+        member = gzip.compress(lines.encode("utf-8"))
+        with open(_partition_path(kind, month), "ab") as f:
+            f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+    return sum(len(r) for r in by_month.values())
+
+
+def list_partitions(kind):
+    """Sortierte Liste der vorhandenen Monate (YYYY-MM)."""
+    path = _archive_dir(kind)
+    return sorted(
+        name[: -len(".jsonl.gz")]
+        for name in os.listdir(path)
+        if name.endswith(".jsonl.gz")
+    )
+
+
+def iter_records(kind, start=None, end=None, predicate=None):
+    """
+    Liest Datensätze zeilenweise (ohne ganze Partitionen in den Speicher zu laden).
+    `start`/`end` (naive UTC) begrenzen die zu lesenden Monatsdateien,
+    `predicate(record)` filtert einzelne Datensätze.
+    """
+    first = _month_of(start) if start else None
+    last = _month_of(end) if end else None
+    for month in list_partitions(kind):
+        if first and month < first:
+            continue
+        if last and month > last:
+            break
+        with gzip.open(_partition_path(kind, month), "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                if predicate is None or predicate(rec):
+                    yield rec
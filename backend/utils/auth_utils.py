@@ -1,29 +1,78 @@
 # backend/utils/auth_utils.py
 import os
+import time
+from functools import lru_cache
 import jwt
-from flask import request, jsonify
-from models import User
+from flask import g, request, has_request_context
+from models import db, User
 from dotenv import load_dotenv
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback_key")
 
 
-def get_current_user():
+@lru_cache(maxsize=1024)
+def _verify_token(token):
+    """Prüft Signatur + Ablauf einmal pro Token; Ergebnis wird gecacht."""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        return None
+    except jwt.InvalidTokenError:
+        return None
+
+
+def _decode_bearer_token():
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         return None
 
     token = auth_header.split(" ")[1]
-    try:
-        decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        user = User.query.get(decoded["user_id"])
-        return {
-            "id": decoded["user_id"],
-            "role": decoded["role"],
-            "user": user,
-        }
-    except jwt.ExpiredSignatureError:
+    payload = _verify_token(token)
+    # Gecachte Tokens können inzwischen abgelaufen sein
+    if payload and payload.get("exp") and payload["exp"] < time.time():
         return None
-    except jwt.InvalidTokenError:
+    return payload
+
+
+class Identity:
+    """
+    Identität des aktuellen Requests (liegt auf flask.g).
+    Token wird einmal geprüft, der User erst beim ersten Zugriff geladen.
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.user_id = payload["user_id"] if payload else None
+        self._user = None
+        self._user_loaded = False
+
+    @property
+    def user(self):
+        if not self._user_loaded:
+            self._user = db.session.get(User, self.user_id) if self.user_id else None
+            self._user_loaded = True
+        return self._user
+
+
+def get_identity():
+    if not has_request_context():
+        return Identity(None)
+    if "identity" not in g:
+        g.identity = Identity(_decode_bearer_token())
+    return g.identity
+
+
+def get_token_payload():
+    return get_identity().payload
+
+
+def get_current_user():
+    identity = get_identity()
+    if not identity.payload:
         return None
+    return {
+        "id": identity.user_id,
+        "role": identity.payload["role"],
+        "user": identity.user,
+    }
@@ -0,0 +1,52 @@
+# backend/utils/borrowed.py
+from datetime import datetime
+from sqlalchemy import exists, update
+from models import db, Tool, Reservation
+from utils.revisions import bump_revisions, TOOLS
+
+# SQLite erlaubt nur eine begrenzte Anzahl gebundener Parameter pro Statement
+_ID_CHUNK_SIZE = 500
+
+
+def recompute_borrowed(tool_ids=None, now=None):
+    """
+    Setzt Tool.is_borrowed set-basiert neu (Stand: `now`, Default jetzt).
+
+    tool_ids=None → alle Tools, sonst nur die angegebenen.
+    Es werden nur Zeilen geschrieben, deren Wert sich ändert (zwei UPDATEs mit
+    EXISTS-Subquery). Committet nicht; gibt die Anzahl geänderter Tools zurück
+    und erhöht dann die Tools-Revision (ETag von /api/tools).
+    """
+    now = now or datetime.utcnow()
+    active = exists().where(
+        Reservation.tool_id == Tool.id,
+        Reservation.start_time <= now,
+        Reservation.end_time >= now,
+    )
+
+    if tool_ids is None:
+        chunks = [None]
+    else:
+        ids = list(tool_ids)
+        chunks = [
+            ids[i : i + _ID_CHUNK_SIZE] for i in range(0, len(ids), _ID_CHUNK_SIZE)
+        ]
+
+    changed = 0
+    for chunk in chunks:
+        scope = [] if chunk is None else [Tool.id.in_(chunk)]
+        changed += db.session.execute(
+            update(Tool)
+            .where(*scope, Tool.is_borrowed.is_not(True), active)
+            .values(is_borrowed=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        changed += db.session.execute(
+            update(Tool)
+            .where(*scope, Tool.is_borrowed.is_not(False), ~active)
+            .values(is_borrowed=False)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    if changed:
+        bump_revisions(TOOLS)
+    return changed
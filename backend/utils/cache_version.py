@@ -0,0 +1,53 @@
+# backend/utils/cache_version.py
+from models import db, CacheVersion
+
+
+def get_version(key):
+    """Aktuelle Version eines Cache-Schlüssels (0, falls noch nie erhöht)."""
+    version = (
+        db.session.query(CacheVersion.version).filter_by(key=key).scalar()
+    )
+    return version or 0
+
+
+def bump_version(key):
+    """
+    Erhöht die Version innerhalb der laufenden Transaktion – wird mit dem
+    Commit des Aufrufers sichtbar.
+    """
+    updated = (
+        CacheVersion.query.filter_by(key=key)
+        .update(
+            {CacheVersion.version: CacheVersion.version + 1},
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        db.session.add(CacheVersion(key=key, version=1))
+
+
+def get_versions(keys):
+    """Versionen mehrerer Schlüssel mit einer Abfrage (gleiche Reihenfolge)."""
+    rows = db.session.query(CacheVersion.key, CacheVersion.version).filter(
+        CacheVersion.key.in_(keys)
+    )
+    found = dict(rows)
+    return [found.get(key, 0) for key in keys]
+
+
+def bump_versions_on(conn, keys):
+    """
+    Wie bump_version, aber als Core-Statements auf einer Verbindung – auch
+    während eines Flushs nutzbar. INSERT OR IGNORE vermeidet Konflikte, wenn
+    zwei Transaktionen einen Schlüssel gleichzeitig zum ersten Mal erhöhen.
+    """
+    table = CacheVersion.__table__
+    for key in keys:
+        conn.execute(
+            table.insert().prefix_with("OR IGNORE").values(key=key, version=0)
+        )
+        conn.execute(
+            table.update()
+            .where(table.c.key == key)
+            .values(version=table.c.version + 1)
+        )
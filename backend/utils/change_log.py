@@ -0,0 +1,28 @@
+# backend/utils/change_log.py
+# Änderungsprotokoll der Reservationen (Delta-Sync der Clients, siehe
+# /api/reservations/changes). Die ID eines Eintrags dient als Revision.
+from datetime import timedelta
+from models import db, ReservationChange
+
+# Wie lange das Änderungsprotokoll für den Delta-Sync aufbewahrt wird
+CHANGE_LOG_DAYS = 7
+
+
+def record_change(res, action="upsert"):
+    """Schreibt einen Eintrag ins Änderungsprotokoll (Teil der laufenden Transaktion)."""
+    db.session.add(
+        ReservationChange(reservation_id=res.id, tool_id=res.tool_id, action=action)
+    )
+
+
+def current_revision():
+    return db.session.query(db.func.max(ReservationChange.id)).scalar() or 0
+
+
+def trim_change_log(now_utc):
+    """Entfernt alte Protokolleinträge, behält aber immer die neueste Revision."""
+    latest = current_revision()
+    ReservationChange.query.filter(
+        ReservationChange.changed_at < now_utc - timedelta(days=CHANGE_LOG_DAYS),
+        ReservationChange.id < latest,
+    ).delete(synchronize_session=False)
@@ -0,0 +1,31 @@
+# backend/utils/csv_import.py
+# Gemeinsame Bausteine für die CSV-Importe (Werkzeuge, Benutzer).
+import csv
+import io
+from flask import request
+from models import db
+
+# Zeilen pro executemany-INSERT
+IMPORT_CHUNK_SIZE = 1000
+
+
+def read_csv_upload(file, delimiter=";"):
+    """
+    Liest eine hochgeladene CSV-Datei zeilenweise (UTF-8 mit/ohne BOM), ohne
+    sie komplett in den Speicher zu laden. `reader.line_num` liefert die
+    Zeilennummer in der Datei.
+    """
+    text = io.TextIOWrapper(file.stream, encoding="utf-8-sig", newline="")
+    return csv.reader(text, delimiter=delimiter)
+
+
+def is_dry_run():
+    """?dry_run=1 (oder Formularfeld dry_run) → nur prüfen, nichts speichern."""
+    value = request.args.get("dry_run") or request.form.get("dry_run") or ""
+    return value.lower() in ("1", "true", "yes")
+
+
+def bulk_insert(model, rows):
+    """Fügt Datensätze (dicts) als executemany-INSERT ein. Committet nicht."""
+    if rows:
+        db.session.execute(model.__table__.insert(), rows)
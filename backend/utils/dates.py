@@ -0,0 +1,22 @@
+# backend/utils/dates.py
+from dateutil.parser import isoparse
+from pytz import timezone
+import pytz
+from utils.logger import write_log
+
+
+def parse_to_utc(val):
+    """Akzeptiert ISO (mit oder ohne Z) und liefert naive UTC-Datetime."""
+    zurich = timezone("Europe/Zurich")
+    try:
+        dt = isoparse(str(val))
+        if dt.tzinfo is None:
+            # lokale Zeit (z. B. "2025-10-14 08:00")
+            dt = zurich.localize(dt)
+        return dt.astimezone(pytz.utc).replace(tzinfo=None)
+
+    except Exception as e:
+        write_log(
+            "error", f"Invalid datetime format in parse_to_utc: '{val}', error: {e}"
+        )
+        raise ValueError("Ungültiges Zeitformat")
@@ -0,0 +1,161 @@
+# backend/utils/log_throttle.py
+import atexit
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+from flask import has_request_context, request
+from utils.logger import write_log, resolve_log_user_id
+
+JOB_ID = "flush_log_throttle"
+
+# Gleiche Einträge (action, details, user) innerhalb dieses Fensters zusammenfassen
+WINDOW_SECONDS = 60
+# Token-Bucket pro Quelle: max. BUCKET_CAPACITY neue Zeilen am Stück,
+# danach REFILL_PER_SECOND Zeilen pro Sekunde
+BUCKET_CAPACITY = 20
+REFILL_PER_SECOND = 0.2
+FLUSH_INTERVAL_SECONDS = 10
+
+
+class LogThrottle:
+    """
+    Dedupliziert und drosselt häufige Log-Einträge (z. B. 404-Stürme von Kiosken).
+
+    Gleiche Einträge werden ab dem ersten Auftreten WINDOW_SECONDS lang
+    gezählt und nach Ablauf des Fensters (spätestens beim nächsten flush) als
+    genau eine Zeile mit count / first_seen / timestamp (zuletzt gesehen)
+    geschrieben. Jedes neue Fenster verbraucht ein Token aus dem Bucket der
+    Quelle (Client-IP); ist er leer, wird nur mitgezählt und später eine
+    einzelne Sammelzeile geschrieben.
+    """
+
+    def __init__(self):
+        self._entries = {}  # (action, details, user_id) -> _Window
+        self._buckets = {}  # source -> [tokens, zuletzt aufgefüllt (monotonic)]
+        self._dropped = {}  # source -> [anzahl, first_seen, last_seen]
+        self._lock = Lock()
+
+    def init_app(self, app, scheduler):
+        scheduler.add_job(
+            id=JOB_ID,
+            func=self.flush,
+            trigger="interval",
+            seconds=FLUSH_INTERVAL_SECONDS,
+        )
+        atexit.register(lambda: self.flush(force=True))
+
+    # -----------------------------
+    # Token-Bucket (Lock muss gehalten werden)
+    # -----------------------------
+    def _take_token(self, source, mono):
+        bucket = self._buckets.get(source)
+        if bucket is None:
+            bucket = self._buckets[source] = [BUCKET_CAPACITY, mono]
+        tokens, last = bucket
+        tokens = min(BUCKET_CAPACITY, tokens + (mono - last) * REFILL_PER_SECOND)
+        if tokens < 1:
+            bucket[0], bucket[1] = tokens, mono
+            return False
+        bucket[0], bucket[1] = tokens - 1, mono
+        return True
+
+    # -----------------------------
+    # Öffentliche Schnittstelle
+    # -----------------------------
+    def log(self, action, details=None, user_id=None, source=None):
+        """
+        Wie write_log, aber dedupliziert und pro Quelle gedrosselt.
+        Gibt True zurück, wenn ein neues Fenster (→ eine Zeile) begonnen wurde.
+        """
+        if source is None:
+            source = request.remote_addr if has_request_context() else "intern"
+        user_id = resolve_log_user_id(user_id)
+        key = (action, details, user_id)
+        now = datetime.utcnow()
+        mono = monotonic()
+
+        expired = None
+        with self._lock:
+            window = self._entries.get(key)
+            if window and mono - window.opened < WINDOW_SECONDS:
+                window.add(now)
+                return False
+
+            if not self._take_token(source, mono):
+                dropped = self._dropped.setdefault(source, [0, now, now])
+                dropped[0] += 1
+                dropped[2] = now
+                return False
+
+            expired = window
+            window = self._entries[key] = _Window(mono)
+            window.add(now)
+
+        if expired:
+            self._write_window(key, expired)
+        return True
+
+    def flush(self, force=False):
+        """Schreibt abgelaufene (bzw. mit force=True alle) Sammelzeilen."""
+        mono = monotonic()
+        with self._lock:
+            done = [
+                key
+                for key, window in self._entries.items()
+                if force or mono - window.opened >= WINDOW_SECONDS
+            ]
+            windows = [(key, self._entries.pop(key)) for key in done]
+            dropped, self._dropped = self._dropped, {}
+            # Volle Buckets brauchen keinen Zustand mehr
+            for source, (tokens, last) in list(self._buckets.items()):
+                refilled = tokens + (mono - last) * REFILL_PER_SECOND
+                if refilled >= BUCKET_CAPACITY:
+                    del self._buckets[source]
+
+        written = 0
+        for key, window in windows:
+            self._write_window(key, window)
+            written += 1
+        for source, (count, first_seen, last_seen) in dropped.items():
+            write_log(
+                "error",
+                f"Rate limit: {count} log entries from {source} suppressed",
+                count=count,
+                first_seen=first_seen,
+                timestamp=last_seen,
+            )
+            written += 1
+        return written
+
+    @staticmethod
+    def _write_window(key, window):
+        action, details, user_id = key
+        write_log(
+            action,
+            details,
+            user_id,
+            count=window.count,
+            first_seen=window.first_seen,
+            timestamp=window.last_seen,
+        )
+
+
+class _Window:
+    """Alle Vorkommen eines Eintrags innerhalb eines Fensters."""
+
+    __slots__ = ("opened", "count", "first_seen", "last_seen")
+
+    def __init__(self, opened):
+        self.opened = opened
+        self.count = 0
+        self.first_seen = None
+        self.last_seen = None
+
+    def add(self, when):
+        self.count += 1
+        if self.first_seen is None:
+            self.first_seen = when
+        self.last_seen = when
+
+
+log_throttle = LogThrottle()
@@ -1,29 +1,154 @@
-from models import db, Log
+import atexit
+import logging
 from datetime import datetime
-from flask import request
-from utils.permissions import get_token_payload
+from queue import Queue, Empty, Full
+from threading import Thread
+from time import monotonic
+from models import db, Log
+from flask import has_request_context
+from utils.auth_utils import get_token_payload
+
+_STOP = object()
+
 
-def write_log(action, details=None, user_id=None):
+class LogWriter:
     """
-    Zentrale Logging-Funktion.
+    Schreibt Log-Einträge gebündelt in einem Hintergrund-Thread mit eigener
+    DB-Verbindung – unabhängig von der Session/Transaktion des Requests.
+
+    Geschrieben wird, sobald BATCH_SIZE Einträge anstehen oder FLUSH_INTERVAL
+    Sekunden vergangen sind. Ist die Queue voll, wartet der Aufrufer bis zu
+    PUT_TIMEOUT Sekunden (Back-Pressure) und schreibt danach selbst synchron.
+    Beim Beenden des Prozesses wird die Queue vollständig geleert.
     """
-    if not user_id:
+
+    BATCH_SIZE = 200
+    FLUSH_INTERVAL = 1.0  # Sekunden
+    QUEUE_SIZE = 10000
+    PUT_TIMEOUT = 2.0  # Sekunden
+
+    def __init__(self):
+        self._queue = Queue(maxsize=self.QUEUE_SIZE)
+        self._engine = None
+        self._thread = None
+        self._logger = logging.getLogger(__name__)
+
+    def init_app(self, app):
+        with app.app_context():
+            self._engine = db.engine
+        # Fehler des Writers selbst landen im Flask-/Gunicorn-Log
+        self._logger = app.logger
+        self._thread = Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def submit(self, row):
+        if not self._thread or not self._thread.is_alive():
+            self._write([row])
+            return
+        try:
+            self._queue.put(row, timeout=self.PUT_TIMEOUT)
+        except Full:
+            self._write([row])
+
+    def flush(self):
+        """Blockiert, bis alle eingereihten Einträge geschrieben sind."""
+        if self._thread and self._thread.is_alive():
+            self._queue.join()
+
+    def shutdown(self):
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=10)
+
+    def _write(self, rows):
+        engine = self._engine or db.engine
+        try:
+            with engine.begin() as conn:
+                conn.execute(Log.__table__.insert(), rows)
+        except Exception:
+            # Logging darf die Anwendung nie zum Absturz bringen
+            self._logger.exception("Log writer error (%d entries lost)", len(rows))
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.FLUSH_INTERVAL)
+            except Empty:
+                continue
+
+            batch = []
+            taken = 1
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+
+            # Weitere Einträge sammeln, bis Batch voll oder Intervall abgelaufen
+            deadline = monotonic() + self.FLUSH_INTERVAL
+            while not stopping and len(batch) < self.BATCH_SIZE:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            # Beim Beenden alles Restliche mitnehmen
+            if stopping:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except Empty:
+                        break
+                    taken += 1
+                    if item is not _STOP:
+                        batch.append(item)
+
+            for i in range(0, len(batch), self.BATCH_SIZE):
+                self._write(batch[i : i + self.BATCH_SIZE])
+            for _ in range(taken):
+                self._queue.task_done()
+
+
+log_writer = LogWriter()
+
+
+def resolve_log_user_id(user_id=None):
+    """User des Log-Eintrags: explizit übergeben, sonst aus dem Token, sonst 0."""
+    if not user_id and has_request_context():
         # Wenn kein user_id übergeben wurde: versuche User aus Token zu laden
         payload = get_token_payload()
         if payload:
             user_id = payload["user_id"]
 
-    if not user_id:
-        user_id = 0  # Gast/Unbekannt
+    return user_id or 0  # 0 = Gast/Unbekannt
 
-    log = Log(
-        user_id=user_id,
-        action=action,
-        details=details,
-        timestamp=datetime.utcnow()
-    )
 
-    db.session.add(log)
-    db.session.commit()
+def write_log(
+    action, details=None, user_id=None, count=1, first_seen=None, timestamp=None
+):
+    """
+    Zentrale Logging-Funktion.
+    Schreibt asynchron über den LogWriter (committet nie die Request-Session).
+    `count`/`first_seen` fassen mehrere gleiche Ereignisse in einer Zeile zusammen.
+    """
+    log_writer.submit(
+        {
+            "user_id": resolve_log_user_id(user_id),
+            "action": action,
+            "details": details,
+            "timestamp": timestamp or datetime.utcnow(),
+            "count": count,
+            "first_seen": first_seen,
+        }
+    )
 
     return True
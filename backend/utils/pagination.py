@@ -0,0 +1,19 @@
+# backend/utils/pagination.py
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaker Keyset-Cursor aus (Zeitstempel, id)."""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Liefert (timestamp, id) aus einem Cursor; ValueError bei ungültigem Wert."""
+    try:
+        raw = urlsafe_b64decode(cursor.encode()).decode()
+        ts_str, id_str = raw.split("|", 1)
+        return datetime.fromisoformat(ts_str), int(id_str)
+    except Exception:
+        raise ValueError("Ungültiger Cursor")
@@ -0,0 +1,41 @@
+# backend/utils/password_pool.py
+# Paralleles Passwort-Hashing für Massenimporte.
+#
+# scrypt/PBKDF2 laufen in OpenSSL und geben dabei den GIL frei – ein
+# Thread-Pool nutzt daher alle Kerne, ohne Worker-Prozesse zu starten (die
+# beim Spawnen app.py samt Scheduler erneut importieren würden).
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from werkzeug.security import generate_password_hash
+
+# Passwörter pro Task (weniger Overhead als ein Task pro Passwort)
+HASH_BATCH_SIZE = 32
+
+_pool = None
+_pool_lock = Lock()
+
+
+def hash_passwords(passwords):
+    return [generate_password_hash(pw) for pw in passwords]
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                thread_name_prefix="password-hash",
+            )
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def submit_hashes(passwords):
+    """
+    Startet das Hashing einer Liste von Passwörtern im Hintergrund und gibt ein
+    Future mit der Liste der Hashes (gleiche Reihenfolge) zurück.
+    """
+    return _get_pool().submit(hash_passwords, list(passwords))
@@ -1,28 +1,105 @@
 # backend/utils/permissions.py
 from functools import wraps
+from threading import RLock
+from time import monotonic
 from flask import request, jsonify
-import jwt
-import os
-from dotenv import load_dotenv
-from models import db, User, RolePermission, Permission
-
-load_dotenv()
-SECRET_KEY = os.getenv("SECRET_KEY", "fallback_key")
-
-
-def get_token_payload():
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return None
-
-    token = auth_header.split(" ")[1]
-    try:
-        decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        return decoded
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
+from werkzeug.local import LocalProxy
+from models import db, User, Role, RolePermission, Permission
+from utils.cache_version import get_version, bump_version
+from utils.auth_utils import get_identity, get_token_payload
+
+# Cache-Schlüssel in CacheVersion für Rollen/Rechte
+PERMISSIONS_VERSION_KEY = "permissions"
+
+
+class PermissionCache:
+    """
+    Rolle → {Permission-Key: Wert} sowie User → Rolle, einmal geladen und im
+    Prozess gehalten. Änderungen über routes/permissions.py bzw. routes/users.py
+    erhöhen die Version in der DB (invalidate_permissions); andere Worker prüfen
+    diese höchstens alle CHECK_INTERVAL Sekunden.
+    """
+
+    CHECK_INTERVAL = 5  # Sekunden
+
+    def __init__(self):
+        self._lock = RLock()
+        self._roles = None  # role_id -> {key: value}
+        self._keys = set()  # definierte Permission-Keys
+        self._user_roles = {}  # user_id -> role_id
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._roles = None
+
+    def _ensure(self):
+        with self._lock:
+            now = monotonic()
+            fresh = now - self._checked_at < self.CHECK_INTERVAL
+            if self._roles is not None and fresh:
+                return
+            version = get_version(PERMISSIONS_VERSION_KEY)
+            if self._roles is None or version != self._version:
+                self._load(version)
+            self._checked_at = now
+
+    def _load(self, version):
+        roles = {role_id: {} for (role_id,) in db.session.query(Role.id)}
+        rows = db.session.query(
+            RolePermission.role_id, Permission.key, RolePermission.value
+        ).join(Permission, Permission.id == RolePermission.permission_id)
+        for role_id, key, value in rows:
+            roles.setdefault(role_id, {})[key] = value
+        self._keys = {key for (key,) in db.session.query(Permission.key)}
+        self._roles = roles
+        self._user_roles = {}
+        self._version = version
+
+    def role_of(self, user_id):
+        """role_id des Benutzers oder None, falls unbekannt."""
+        with self._lock:
+            self._ensure()
+            if user_id in self._user_roles:
+                return self._user_roles[user_id]
+        role_id = (
+            db.session.query(User.role_id).filter(User.id == user_id).scalar()
+        )
+        if role_id:
+            # Unbekannte IDs nicht cachen (könnten später vergeben werden)
+            with self._lock:
+                self._user_roles[user_id] = role_id
+        return role_id
+
+    def is_defined(self, perm_key):
+        with self._lock:
+            self._ensure()
+            return perm_key in self._keys
+
+    def permissions_for_role(self, role_id):
+        """Kopie von {key: value} oder None, falls die Rolle nicht existiert."""
+        with self._lock:
+            self._ensure()
+            perms = self._roles.get(role_id)
+            return dict(perms) if perms is not None else None
+
+    def value_for(self, user_id, perm_key):
+        """Wert einer Permission für einen Benutzer (unbekannt → 'false')."""
+        if not user_id:
+            return "false"
+        role_id = self.role_of(user_id)
+        perms = self.permissions_for_role(role_id) if role_id else None
+        return (perms or {}).get(perm_key, "false")
+
+
+permission_cache = PermissionCache()
+
+
+def invalidate_permissions():
+    """Nach Änderungen an Rollen/Rechten/Benutzerrollen aufrufen (vor dem Commit)."""
+    bump_version(PERMISSIONS_VERSION_KEY)
+    permission_cache.invalidate()
 
 
 def requires_permission(permission_key):
@@ -33,13 +110,13 @@ def requires_permission(permission_key):
             if not payload:
                 return jsonify({"error": "Nicht autorisiert"}), 401
 
-            user = db.session.get(User, payload["user_id"])
-            if not user:
+            user_id = payload["user_id"]
+            role_id = permission_cache.role_of(user_id)
+            if not role_id:
                 return jsonify({"error": "Benutzer nicht gefunden"}), 401
 
             # Prüfe, ob Recht existiert
-            permission = Permission.query.filter_by(key=permission_key).first()
-            if not permission:
+            if not permission_cache.is_defined(permission_key):
                 return (
                     jsonify(
                         {"error": f"Berechtigung '{permission_key}' nicht definiert"}
@@ -48,20 +125,19 @@ def requires_permission(permission_key):
                 )
 
             # Hole Zuweisung Rolle ↔ Berechtigung
-            role_permission = RolePermission.query.filter_by(
-                role_id=user.role_id, permission_id=permission.id
-            ).first()
-
-            if not role_permission:
+            value = (permission_cache.permissions_for_role(role_id) or {}).get(
+                permission_key
+            )
+            if value is None:
                 return jsonify({"error": "Keine Berechtigung zugewiesen"}), 403
 
-            value = role_permission.value
             if value == "false":
                 return jsonify({"error": "Zugriff verweigert"}), 403
 
-            # Bei self_only kannst du im Handler selbst weiter prüfen (z. B. ob Reservation zur eigenen user_id gehört)
-            request.user = user  # ← für Zugriff im Handler
-            request.permission_value = value  # ← z. B. "true" oder "self_only"
+            # Bei self_only kannst du im Handler selbst weiter prüfen (z. B. ob Reservation zur eigenen user_id gehört)
+            # User wird erst bei Zugriff geladen (einmal pro Request)
+            request.user = LocalProxy(lambda: get_identity().user)
+            request.permission_value = value  # ← z. B. "true" oder "self_only"
 
             return f(*args, **kwargs)
 
@@ -78,14 +154,13 @@ def requires_any_permission(*required_keys):
             if not payload:
                 return jsonify({"error": "Nicht authentifiziert"}), 401
 
-            user = db.session.get(User, payload["user_id"])
-            if not user or not user.role:
+            role_id = permission_cache.role_of(payload["user_id"])
+            perms = permission_cache.permissions_for_role(role_id) if role_id else None
+            if perms is None:
                 return jsonify({"error": "Zugriff verweigert"}), 403
 
             user_perms = {
-                rp.permission.key
-                for rp in user.role.permissions
-                if rp.value.lower() == "true"
+                key for key, value in perms.items() if value.lower() == "true"
             }
 
             if not any(key in user_perms for key in required_keys):
@@ -0,0 +1,195 @@
+# backend/utils/qr_allocator.py
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, func, update
+from sqlalchemy.exc import IntegrityError
+from models import db, Tool, User, QrSequence, QrReservation
+
+# Art → (Modell, Präfix der QR-Codes)
+QR_KINDS = {
+    "tool": (Tool, "tool"),
+    "user": (User, "usr"),
+}
+
+# Wie lange eine per next-id vorgeschlagene Nummer für das Formular reserviert bleibt
+RESERVATION_TTL = timedelta(minutes=30)
+MAX_RETRIES = 5
+# Fenstergrösse beim Prüfen freier Nummern
+PROBE_BATCH = 500
+MIN_PROBE = 20
+
+
+def format_qr(prefix, number):
+    return f"{prefix}{number:04d}"
+
+
+def _parse_number(prefix, key):
+    match = re.fullmatch(rf"{prefix}(\d+)", key or "")
+    return int(match.group(1)) if match else None
+
+
+def _release_expired(prefix, now):
+    """Gibt abgelaufene Reservationen frei und senkt die Marke entsprechend."""
+    lowest = (
+        db.session.query(func.min(QrReservation.number))
+        .filter(QrReservation.prefix == prefix, QrReservation.expires_at < now)
+        .scalar()
+    )
+    if lowest is None:
+        return
+    db.session.execute(
+        delete(QrReservation).where(
+            QrReservation.prefix == prefix, QrReservation.expires_at < now
+        )
+    )
+    db.session.execute(
+        update(QrSequence)
+        .where(QrSequence.prefix == prefix, QrSequence.next_free > lowest)
+        .values(next_free=lowest)
+    )
+
+
+def _take(kind, count):
+    """
+    Sucht ab der Marke `count` freie Nummern und schiebt die Marke dahinter.
+    Nummern unterhalb der Marke sind immer belegt oder reserviert – geprüft
+    wird daher nur ein Fenster ab der Marke (indizierte IN-Abfrage auf qr_key),
+    bei fortlaufender Vergabe eine Abfrage pro PROBE_BATCH Nummern.
+    Committet nicht.
+    """
+    model, prefix = QR_KINDS[kind]
+    seq = db.session.get(QrSequence, prefix)
+    if seq is None:
+        seq = QrSequence(prefix=prefix, next_free=1)
+        db.session.add(seq)
+
+    numbers = []
+    number = seq.next_free
+    # Noch nicht geflushte, soeben vergebene Codes liegen bereits unter der Marke
+    with db.session.no_autoflush:
+        while len(numbers) < count:
+            size = min(PROBE_BATCH, max(count - len(numbers), MIN_PROBE))
+            window = range(number, number + size)
+            codes = [format_qr(prefix, n) for n in window]
+            used = {
+                key
+                for (key,) in db.session.query(model.qr_key).filter(
+                    model.qr_key.in_(codes)
+                )
+            }
+            reserved = {
+                n
+                for (n,) in db.session.query(QrReservation.number).filter(
+                    QrReservation.prefix == prefix,
+                    QrReservation.number.between(window[0], window[-1]),
+                )
+            }
+            for n, code in zip(window, codes):
+                number = n + 1
+                if code not in used and n not in reserved:
+                    numbers.append(n)
+                    if len(numbers) == count:
+                        break
+    seq.next_free = number
+    return numbers
+
+
+def allocate_qr_codes(kind, count=1):
+    """
+    Vergibt `count` neue QR-Codes innerhalb der laufenden Transaktion
+    (z. B. CSV-Import). Die Codes gelten als belegt, sobald die Datensätze
+    mit dem Aufrufer committet werden.
+    """
+    _, prefix = QR_KINDS[kind]
+    return [format_qr(prefix, n) for n in _take(kind, count)]
+
+
+def reserve_qr_code(kind):
+    """
+    Reserviert die nächste freie Nummer für ein offenes Formular und committet
+    sofort, damit parallel arbeitende Admins unterschiedliche Codes erhalten.
+    Nicht verwendete Reservationen verfallen nach RESERVATION_TTL.
+    """
+    _, prefix = QR_KINDS[kind]
+    for attempt in range(MAX_RETRIES):
+        now = datetime.utcnow()
+        try:
+            _release_expired(prefix, now)
+            (number,) = _take(kind, 1)
+            db.session.add(
+                QrReservation(
+                    prefix=prefix, number=number, expires_at=now + RESERVATION_TTL
+                )
+            )
+            db.session.commit()
+            return format_qr(prefix, number)
+        except IntegrityError:
+            # Gleichzeitige Vergabe derselben Nummer → mit neuer Marke erneut
+            db.session.rollback()
+            if attempt == MAX_RETRIES - 1:
+                raise
+
+
+# -----------------------------
+# Nummern-Buchhaltung bei Änderungen an Tools/Benutzern
+#   – freigewordene Nummern (gelöscht / QR geändert) senken die Marke
+#   – verwendete Reservationen werden sofort aufgelöst
+# -----------------------------
+def _numbers(prefix, codes):
+    for code in codes:
+        number = _parse_number(prefix, str(code).strip().lower())
+        if number is not None:
+            yield number
+
+
+def _lower_marks(conn, freed):
+    """freed: Präfix → kleinste freigewordene Nummer."""
+    seq = QrSequence.__table__
+    for prefix, number in freed.items():
+        conn.execute(
+            seq.update()
+            .where(seq.c.prefix == prefix, seq.c.next_free > number)
+            .values(next_free=number)
+        )
+
+
+def release_qr_codes(kind, codes):
+    """
+    Für Core-Löschungen (ohne ORM-Flush): senkt die Marke auf die kleinste
+    freigewordene Nummer. Committet nicht.
+    """
+    _, prefix = QR_KINDS[kind]
+    numbers = list(_numbers(prefix, codes))
+    if numbers:
+        _lower_marks(db.session.connection(), {prefix: min(numbers)})
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_qr_numbers(session, flush_context):
+    freed = {}
+    used = []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        for model, prefix in QR_KINDS.values():
+            if not isinstance(obj, model):
+                continue
+            history = db.inspect(obj).attrs.qr_code.history
+            if obj in session.deleted:
+                old_codes, new_codes = [obj.qr_code], []
+            else:
+                old_codes, new_codes = history.deleted or (), history.added or ()
+            for number in _numbers(prefix, old_codes):
+                freed[prefix] = min(freed.get(prefix, number), number)
+            used.extend((prefix, number) for number in _numbers(prefix, new_codes))
+
+    if not freed and not used:
+        return
+
+    conn = session.connection()
+    res = QrReservation.__table__
+    _lower_marks(conn, freed)
+    if used:
+        conn.execute(
+            res.delete().where(
+                db.tuple_(res.c.prefix, res.c.number).in_(used)
+            )
+        )
@@ -0,0 +1,256 @@
+# backend/utils/qr_labels.py
+# Etikettenbögen mit QR-Codes (A4, 3 × 8 Etiketten) als PDF oder ZIP mit PNGs.
+#
+# Die Etiketten (QR-Code + Beschriftung) werden in einem Prozess-Pool erzeugt
+# (utils/qr_render.py) und nach Inhalt auf der Platte gecacht
+# (instance/qr_cache) – ein Nachdruck setzt die Bögen nur noch aus den
+# gecachten Bildern zusammen. Die Ausgabe wird seitenweise erzeugt und
+# gestreamt; es sind immer nur wenige Batches gleichzeitig im Speicher.
+#
+# qrcode und Pillow stehen in requirements.txt; fehlen sie, antwortet der
+# Export mit 501, der Rest der App läuft weiter.
+import atexit
+import io
+import multiprocessing
+import os
+import sys
+import types
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+try:
+    from PIL import Image
+    from utils import qr_render
+    from utils.qr_render import DPI, PAGE_SIZE, COLUMNS, LABELS_PER_PAGE, LABEL_SIZE
+except ImportError:  # optional
+    qr_render = None
+
+MAX_LABELS = 5000
+# Etiketten pro Pool-Task
+RENDER_BATCH_SIZE = 32
+# qrcode rechnet in reinem Python (hält die GIL) → Prozesse statt Threads
+MAX_RENDER_WORKERS = 4
+# Batches, die gleichzeitig in Arbeit sind (begrenzt den Speicher pro Export)
+MAX_PENDING_BATCHES = 2 * MAX_RENDER_WORKERS
+
+_pool = None
+_pool_lock = Lock()
+
+
+def labels_available():
+    return qr_render is not None
+
+
+def cache_dir(instance_path):
+    path = os.path.join(instance_path, "qr_cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _get_pool():
+    """
+    Prozess-Pool mit "spawn": fork ist in einem Server mit laufenden Threads
+    (Scheduler, Log-Writer) nicht sicher. Die Worker importieren nur
+    utils/qr_render.py. Beim Start wird __main__ kurz durch ein leeres Modul
+    ersetzt, sonst würde multiprocessing app.py (Scheduler usw.) in jedem
+    Worker erneut ausführen. Alle Worker werden deshalb sofort gestartet.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = min(MAX_RENDER_WORKERS, os.cpu_count() or 1)
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            main = sys.modules["__main__"]
+            sys.modules["__main__"] = types.ModuleType("__main__")
+            try:
+                # Ohne freie Worker startet jedes submit() einen neuen Prozess
+                for _ in range(workers):
+                    pool.submit(int)
+            finally:
+                sys.modules["__main__"] = main
+            atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+            _pool = pool
+        return _pool
+
+
+class LabelImages:
+    """
+    Etikettenbilder zu einer Liste von (Code, Titel) in dieser Reihenfolge.
+    Cache-Treffer werden von der Platte gelesen, fehlende Etiketten batchweise
+    im Pool erzeugt – höchstens MAX_PENDING_BATCHES im Voraus, fertige Batches
+    werden nach dem Ausgeben verworfen.
+    """
+
+    def __init__(self, labels, directory):
+        self.labels = labels
+        self._directory = directory
+        unique = set(labels)
+        self.cached = sum(
+            1
+            for label in unique
+            if os.path.exists(qr_render.cache_path(directory, *label))
+        )
+        self.rendered = len(unique) - self.cached
+
+    def __iter__(self):
+        pending = deque()
+        for start in range(0, len(self.labels), RENDER_BATCH_SIZE):
+            batch = self.labels[start : start + RENDER_BATCH_SIZE]
+            pending.append(self._submit(batch))
+            if len(pending) >= MAX_PENDING_BATCHES:
+                yield from self._collect(*pending.popleft())
+        while pending:
+            yield from self._collect(*pending.popleft())
+
+    def _submit(self, batch):
+        missing = [
+            label
+            for label in dict.fromkeys(batch)
+            if not os.path.exists(qr_render.cache_path(self._directory, *label))
+        ]
+        future = None
+        if missing:
+            future = _get_pool().submit(
+                qr_render.render_batch, missing, self._directory
+            )
+        return batch, missing, future
+
+    def _collect(self, batch, missing, future):
+        rendered = dict(zip(missing, future.result())) if future else {}
+        for label in batch:
+            data = rendered.get(label)
+            if data is None:
+                with open(qr_render.cache_path(self._directory, *label), "rb") as f:
+                    data = f.read()
+            yield Image.open(io.BytesIO(data))
+
+
+# -----------------------------
+# Bögen zusammensetzen
+# -----------------------------
+def _pages(images):
+    """Graustufenbild pro Bogen, Etiketten zeilenweise von links oben."""
+    page = None
+    for i, image in enumerate(images):
+        slot = i % LABELS_PER_PAGE
+        if slot == 0:
+            if page is not None:
+                yield page
+            page = Image.new("L", PAGE_SIZE, 255)
+        x = (slot % COLUMNS) * LABEL_SIZE[0]
+        y = (slot // COLUMNS) * LABEL_SIZE[1]
+        page.paste(image, (x, y))
+    if page is not None:
+        yield page
+
+
+# -----------------------------
+# Ausgabe (gestreamt)
+# -----------------------------
+def _pdf_object(number, body, stream=None):
+    head = f"{number} 0 obj\n".encode() + body
+    if stream is None:
+        return head + b"\nendobj\n"
+    return head + b"\nstream\n" + stream + b"\nendstream\nendobj\n"
+
+
+def iter_pdf(images):
+    """
+    Schreibt ein PDF Seite für Seite (ein Graustufenbild pro Seite). Objekt 1
+    ist der Katalog, Objekt 2 der Seitenbaum – beide folgen am Ende, da erst
+    dann alle Seiten bekannt sind.
+    """
+    offsets = {}
+    position = 0
+    next_number = 3
+    page_numbers = []
+    width_pt = PAGE_SIZE[0] * 72 / DPI
+    height_pt = PAGE_SIZE[1] * 72 / DPI
+
+    def emit(number, body, stream=None):
+        nonlocal position
+        offsets[number] = position
+        data = _pdf_object(number, body, stream)
+        position += len(data)
+        return data
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position += len(header)
+    yield header
+
+    for page in _pages(images):
+        image_no, content_no, page_no = next_number, next_number + 1, next_number + 2
+        next_number += 3
+        # Bögen sind fast leer → schnelle Stufe komprimiert kaum schlechter
+        pixels = zlib.compress(page.tobytes(), 1)
+        yield emit(
+            image_no,
+            (
+                f"<< /Type /XObject /Subtype /Image /Width {PAGE_SIZE[0]} "
+                f"/Height {PAGE_SIZE[1]} /ColorSpace /DeviceGray "
+                f"/BitsPerComponent 8 /Filter /FlateDecode /Length {len(pixels)} >>"
+            ).encode(),
+            pixels,
+        )
+        content = f"q {width_pt:.2f} 0 0 {height_pt:.2f} 0 0 cm /Im0 Do Q".encode()
+        yield emit(content_no, f"<< /Length {len(content)} >>".encode(), content)
+        yield emit(
+            page_no,
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width_pt:.2f} "
+                f"{height_pt:.2f}] /Resources << /XObject << /Im0 {image_no} 0 R >> >> "
+                f"/Contents {content_no} 0 R >>"
+            ).encode(),
+        )
+        page_numbers.append(page_no)
+
+    kids = " ".join(f"{n} 0 R" for n in page_numbers)
+    yield emit(
+        2,
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode(),
+    )
+    yield emit(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    xref = [f"xref\n0 {next_number}\n", "0000000000 65535 f \n"]
+    xref += [f"{offsets[n]:010d} 00000 n \n" for n in range(1, next_number)]
+    xref.append(
+        f"trailer\n<< /Size {next_number} /Root 1 0 R >>\n"
+        f"startxref\n{position}\n%%EOF\n"
+    )
+    yield "".join(xref).encode()
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Nicht-seekbares Ziel für zipfile; gesammelte Bytes werden abgeholt."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_png_zip(images):
+    """ZIP mit einer PNG-Datei pro Bogen, Seite für Seite gestreamt."""
+    out = _ChunkWriter()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as archive:
+        for number, page in enumerate(_pages(images), start=1):
+            buf = io.BytesIO()
+            page.save(buf, "PNG", dpi=(DPI, DPI))
+            archive.writestr(f"etiketten_{number:03d}.png", buf.getvalue())
+            yield out.drain()
+    yield out.drain()
@@ -0,0 +1,109 @@
+# backend/utils/qr_lookup.py
+from collections import OrderedDict
+from threading import Lock
+from sqlalchemy import event
+from models import db, Tool, User
+
+CACHE_SIZE = 4096
+
+
+def normalize_qr(code):
+    """Entspricht der DB-Spalte qr_key = lower(trim(qr_code))."""
+    return str(code or "").strip().lower()
+
+
+class QrCache:
+    """
+    LRU-Cache QR-Schlüssel → ID für Tools und Benutzer (Scan-Pfad).
+
+    Treffer werden beim Laden über den Primärschlüssel gegengeprüft
+    (qr_key muss noch passen), daher sind veraltete Einträge – z. B. aus
+    Änderungen anderer Worker – harmlos. Nicht gefundene Codes werden nicht
+    gecacht, da der QR-Modus unbekannte Codes neu anlegt.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self._size = size
+        self._entries = OrderedDict()  # (model, qr_key) -> id
+        self._lock = Lock()
+
+    def get(self, model, key):
+        with self._lock:
+            obj_id = self._entries.get((model, key))
+            if obj_id is not None:
+                self._entries.move_to_end((model, key))
+            return obj_id
+
+    def put(self, model, key, obj_id):
+        with self._lock:
+            self._entries[(model, key)] = obj_id
+            self._entries.move_to_end((model, key))
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def discard(self, model, key):
+        with self._lock:
+            self._entries.pop((model, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+qr_cache = QrCache()
+
+
+def _find_by_qr(model, code):
+    key = normalize_qr(code)
+    if not key:
+        return None
+
+    obj_id = qr_cache.get(model, key)
+    if obj_id is not None:
+        obj = db.session.get(model, obj_id)
+        if obj is not None and obj.qr_key == key:
+            return obj
+        qr_cache.discard(model, key)
+
+    obj = model.query.filter(model.qr_key == key).first()
+    if obj is not None:
+        qr_cache.put(model, key, obj.id)
+    return obj
+
+
+def find_tool_by_qr(code):
+    """Werkzeug zum QR-Code (Gross-/Kleinschreibung und Leerzeichen egal)."""
+    return _find_by_qr(Tool, code)
+
+
+def find_user_by_qr(code):
+    """Benutzer zum QR-Code (Gross-/Kleinschreibung und Leerzeichen egal)."""
+    return _find_by_qr(User, code)
+
+
+# -----------------------------
+# Invalidierung nach Commit (geänderte/gelöschte QR-Codes)
+# -----------------------------
+_PENDING_KEY = "qr_cache_ops"
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_qr_changes(session, flush_context):
+    keys = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, (Tool, User)):
+            continue
+        history = db.inspect(obj).attrs.qr_code.history
+        for code in list(history.deleted or ()) + [obj.qr_code]:
+            keys.add((type(obj), normalize_qr(code)))
+
+
+@event.listens_for(db.session, "after_commit")
+def _apply_qr_changes(session):
+    for model, key in session.info.pop(_PENDING_KEY, None) or ():
+        qr_cache.discard(model, key)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_qr_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,121 @@
+# backend/utils/qr_render.py
+# Einzelne QR-Etiketten zeichnen – läuft in den Render-Prozessen von
+# utils/qr_labels.py. Importiert bewusst nur qrcode und Pillow (keine App,
+# keine Datenbank), damit neu gestartete Worker-Prozesse schnell und ohne
+# Nebenwirkungen bereit sind.
+import hashlib
+import io
+import os
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+# Bogen: A4 bei 200 dpi, 3 Spalten × 8 Zeilen (70 × 37 mm)
+DPI = 200
+PAGE_SIZE = (1654, 2339)
+COLUMNS = 3
+ROWS = 8
+LABELS_PER_PAGE = COLUMNS * ROWS
+LABEL_SIZE = (PAGE_SIZE[0] // COLUMNS, PAGE_SIZE[1] // ROWS)
+QR_SIZE = 240
+MARGIN = 20
+FONT_SIZE = 30
+
+# Bei geänderter Darstellung erhöhen → alter Cache wird nicht mehr verwendet
+RENDER_VERSION = 1
+
+_fonts = None
+
+
+def cache_path(directory, code, title):
+    key = f"{RENDER_VERSION}|{code}|{title}"
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(directory, f"{digest}.png")
+
+
+def _font(size):
+    for name in ("DejaVuSans.ttf", "arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            pass
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:  # Pillow < 10.1
+        return ImageFont.load_default()
+
+
+def _get_fonts():
+    global _fonts
+    if _fonts is None:
+        _fonts = (_font(FONT_SIZE), _font(FONT_SIZE - 4))
+    return _fonts
+
+
+def _fit_lines(draw, text, font, width, max_lines=3):
+    """Bricht `text` wortweise auf die Etikettenbreite um (max. `max_lines`)."""
+    lines = []
+    current = ""
+    for word in str(text or "").split():
+        candidate = f"{current} {word}".strip()
+        if current and draw.textlength(candidate, font=font) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    if len(lines) > max_lines:
+        lines = lines[: max_lines - 1] + [" ".join(lines[max_lines - 1 :])]
+    result = []
+    for line in lines:
+        while draw.textlength(line, font=font) > width and len(line) > 1:
+            line = line[:-2] + "…"
+        result.append(line)
+    return result
+
+
+def _render_qr(code):
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=1)
+    qr.add_data(code)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white").get_image()
+    return img.convert("L").resize((QR_SIZE, QR_SIZE), Image.NEAREST)
+
+
+def render_label(code, title):
+    """Ein Etikett (QR-Code links, Titel und Code rechts) als PNG."""
+    title_font, code_font = _get_fonts()
+    label = Image.new("L", LABEL_SIZE, 255)
+    draw = ImageDraw.Draw(label)
+    text_w = LABEL_SIZE[0] - QR_SIZE - 3 * MARGIN
+    qr_y = (LABEL_SIZE[1] - QR_SIZE) // 2
+    label.paste(_render_qr(code), (MARGIN, qr_y))
+
+    text_x = QR_SIZE + 2 * MARGIN
+    text_y = qr_y
+    for line in _fit_lines(draw, title, title_font, text_w):
+        draw.text((text_x, text_y), line, font=title_font, fill=0)
+        text_y += FONT_SIZE + 8
+    draw.text(
+        (text_x, qr_y + QR_SIZE - FONT_SIZE),
+        _fit_lines(draw, code, code_font, text_w, max_lines=1)[0],
+        font=code_font,
+        fill=0,
+    )
+    buf = io.BytesIO()
+    label.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def render_batch(labels, directory):
+    """Erzeugt die Etiketten, legt sie im Cache ab und gibt die PNGs zurück."""
+    result = []
+    for code, title in labels:
+        data = render_label(code, title)
+        path = cache_path(directory, code, title)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        result.append(data)
+    return result
@@ -0,0 +1,96 @@
+# backend/utils/revisions.py
+# Revisionszähler pro Tabelle (in CacheVersion) für bedingte GETs mit ETag.
+#
+# ORM-Änderungen erhöhen die Zähler automatisch beim Flush (gleiche
+# Transaktion); Core-Schreibpfade (Importe, set-basierte UPDATEs) rufen
+# bump_revisions() selbst auf.
+from functools import wraps
+from flask import make_response, request
+from sqlalchemy import event
+from models import (
+    db,
+    Tool,
+    ToolCategory,
+    User,
+    Company,
+    Role,
+    Permission,
+    RolePermission,
+)
+from utils.cache_version import get_versions, bump_versions_on
+
+TOOLS = "tools"
+CATEGORIES = "categories"
+USERS = "users"
+COMPANIES = "companies"
+ROLES = "roles"
+ROLE_PERMISSIONS = "role_permissions"
+
+_MODEL_TABLES = {
+    Tool: TOOLS,
+    ToolCategory: CATEGORIES,
+    User: USERS,
+    Company: COMPANIES,
+    Role: ROLES,
+    Permission: ROLE_PERMISSIONS,
+    RolePermission: ROLE_PERMISSIONS,
+}
+
+
+def _version_key(table):
+    return f"rev:{table}"
+
+
+def bump_revisions(*tables):
+    """Erhöht die Revision(en) innerhalb der laufenden Transaktion."""
+    bump_versions_on(db.session.connection(), [_version_key(t) for t in tables])
+
+
+def conditional_etag(*tables):
+    """
+    Decorator für Listen-Endpoints: starkes ETag aus den Revisionen der
+    angegebenen Tabellen. Passt If-None-Match, wird ohne Aufruf der View mit
+    304 geantwortet. Unter requires_permission einsetzen (Auth zuerst).
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            # Revision vor den Daten lesen → im Zweifel ein zu altes ETag
+            # (nächster Request lädt neu), nie ein zu neues
+            versions = get_versions([_version_key(t) for t in tables])
+            etag = "-".join(f"{t}.{v}" for t, v in zip(tables, versions))
+
+            if request.if_none_match.contains(etag):
+                resp = make_response("", 304)
+            else:
+                resp = make_response(f(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = "private, no-cache"
+            return resp
+
+        return wrapper
+
+    return decorator
+
+
+# -----------------------------
+# ORM-Änderungen → Revisionen erhöhen (im selben Flush/Transaktion)
+# -----------------------------
+@event.listens_for(db.session, "after_flush")
+def _bump_changed_tables(session, flush_context):
+    tables = set()
+    for obj in list(session.new) + list(session.deleted):
+        table = _MODEL_TABLES.get(type(obj))
+        if table:
+            tables.add(table)
+    for obj in session.dirty:
+        table = _MODEL_TABLES.get(type(obj))
+        if table and session.is_modified(obj, include_collections=False):
+            tables.add(table)
+    if tables:
+        bump_versions_on(
+            session.connection(), [_version_key(t) for t in sorted(tables)]
+        )
@@ -0,0 +1,79 @@
+# backend/utils/schema.py
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from models import db
+from utils.logger import write_log
+
+
+def ensure_schema():
+    """
+    Ergänzt bestehende Datenbanken um Spalten und Indizes, die nach dem ersten
+    db.create_all() hinzugekommen sind (create_all legt nur neue Tabellen an).
+    Neue Spalten müssen nullable sein oder einen server_default haben.
+
+    Jeder Schritt läuft für sich: ein fehlgeschlagener Schritt wird geloggt,
+    die übrigen werden trotzdem ausgeführt. Erst alle Spalten, dann die
+    Indizes (die Indizes können neue Spalten verwenden).
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    for table in db.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        text(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+                    )
+            except Exception as e:
+                write_log(
+                    "error",
+                    f"Schema: adding column {table.name}.{column.name} failed: "
+                    f"{repr(e)}",
+                )
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                if index.unique and _has_duplicates(engine, index):
+                    continue
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                write_log(
+                    "error", f"Schema: creating index {index.name} failed: {repr(e)}"
+                )
+
+
+def _has_duplicates(engine, index):
+    """
+    Prüft vor dem Anlegen eines Unique-Index, ob die Daten ihn verletzen würden
+    (z. B. QR-Codes, die sich nur in Gross-/Kleinschreibung unterscheiden).
+    Gefundene Duplikate werden geloggt; der Index wird dann nicht angelegt.
+    """
+    if inspect(engine).has_index(index.table.name, index.name):
+        return False
+    columns = list(index.columns)
+    not_null = db.and_(*(c.isnot(None) for c in columns))
+    query = (
+        db.select(*columns, db.func.count().label("n"))
+        .where(not_null)
+        .group_by(*columns)
+        .having(db.func.count() > 1)
+        .limit(10)
+    )
+    with engine.connect() as conn:
+        duplicates = conn.execute(query).all()
+    if not duplicates:
+        return False
+    values = ", ".join(
+        f"{'/'.join(str(v) for v in row[:-1])} ({row[-1]}×)" for row in duplicates
+    )
+    write_log(
+        "error",
+        f"Schema: unique index {index.name} skipped, duplicate values in "
+        f"{index.table.name}.{'/'.join(c.name for c in columns)}: {values}",
+    )
+    return True
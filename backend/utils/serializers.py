@@ -0,0 +1,186 @@
+# backend/utils/serializers.py
+# Spalten-Projektionen und JSON-Ausgabe für Tools, Benutzer und Reservationen.
+#
+# Listen werden als Zeilen-Tupel geladen (nur die benötigten Spalten, Joins nur
+# wenn ein angefragtes Feld sie braucht) – ohne ORM-Objekte und Identity-Map.
+# Kodiert wird mit orjson, falls installiert, sonst mit dem json-Modul.
+import json
+import pytz
+from flask import Response, request
+from models import db, Tool, ToolCategory, User, Company, Role, Reservation
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+class Projection:
+    """
+    Feldname → Spalte (+ optionaler Formatierer) für eine Ressource.
+    `joins` ordnet Feldern die benötigte Tabelle zu (LEFT OUTER JOIN).
+    """
+
+    def __init__(self, model, fields, joins=None):
+        self.model = model
+        self.fields = fields
+        self.joins = joins or {}
+
+    def parse_fields(self, value=None):
+        """
+        ?fields=id,name → Liste der Felder (in Standard-Reihenfolge).
+        Ohne Angabe alle Felder; unbekannte Felder → ValueError.
+        """
+        if value is None:
+            value = request.args.get("fields")
+        if not value:
+            return list(self.fields)
+        requested = {f.strip() for f in value.split(",") if f.strip()}
+        unknown = requested - self.fields.keys()
+        if unknown:
+            raise ValueError(f"Unbekannte Felder: {', '.join(sorted(unknown))}")
+        return [name for name in self.fields if name in requested]
+
+    def query(self, names, *extra):
+        """Abfrage der Felder `names`; `extra`-Spalten folgen am Zeilenende."""
+        columns = [self._column(name).label(name) for name in names]
+        query = db.session.query(*columns, *extra).select_from(self.model)
+        joined = set()
+        for name in names:
+            target = self.joins.get(name)
+            if target is not None and target[0] not in joined:
+                query = query.outerjoin(*target)
+                joined.add(target[0])
+        return query
+
+    def to_dicts(self, names, rows):
+        """Zeilen → dicts; Zusatzspalten hinter `names` werden ignoriert."""
+        formatters = [
+            (i, self.fields[name][1])
+            for i, name in enumerate(names)
+            if isinstance(self.fields[name], tuple)
+        ]
+        result = []
+        for row in rows:
+            values = list(row[: len(names)])
+            for i, fmt in formatters:
+                values[i] = fmt(values[i])
+            result.append(dict(zip(names, values)))
+        return result
+
+    def one(self, obj_id, names=None):
+        """Einzelner Datensatz als dict (z. B. Antwort nach Anlegen/Ändern)."""
+        names = names or list(self.fields)
+        row = self.query(names).filter(self.model.id == obj_id).first()
+        return self.to_dicts(names, [row])[0] if row else None
+
+    def _column(self, name):
+        field = self.fields[name]
+        return field[0] if isinstance(field, tuple) else field
+
+
+TOOL_FIELDS = Projection(
+    Tool,
+    {
+        "id": Tool.id,
+        "name": Tool.name,
+        "qr_code": Tool.qr_code,
+        "category_id": Tool.category_id,
+        "category_name": ToolCategory.name,
+        "status": Tool.status,
+        "is_borrowed": Tool.is_borrowed,
+        "created_at": (Tool.created_at, _iso),
+    },
+    joins={"category_name": (ToolCategory, Tool.category_id == ToolCategory.id)},
+)
+
+USER_FIELDS = Projection(
+    User,
+    {
+        "id": User.id,
+        "username": User.username,
+        "first_name": User.first_name,
+        "last_name": User.last_name,
+        "company_id": User.company_id,
+        "company_name": Company.name,
+        "qr_code": User.qr_code,
+        "role": Role.name,
+        "created_at": (User.created_at, _iso),
+        "last_login": (User.last_login, _iso),
+        "last_active": (User.last_active, _iso),
+    },
+    joins={
+        "company_name": (Company, User.company_id == Company.id),
+        "role": (Role, User.role_id == Role.id),
+    },
+)
+
+
+# -----------------------------
+# Reservationen (verschachtelte Ausgabe mit Benutzer und Werkzeug)
+# -----------------------------
+def reservation_query():
+    """
+    Zeilen-Abfrage für Reservationen inkl. Benutzer- und Werkzeugspalten.
+    LEFT OUTER JOIN: Reservationen bleiben sichtbar, auch wenn der Benutzer
+    oder das Werkzeug fehlt (Spalten dann None).
+    """
+    return (
+        db.session.query(
+            Reservation.id,
+            Reservation.start_time,
+            Reservation.end_time,
+            Reservation.note,
+            Reservation.user_id,
+            User.username,
+            User.first_name,
+            User.last_name,
+            Reservation.tool_id,
+            Tool.name.label("tool_name"),
+            Tool.qr_code.label("tool_qr_code"),
+        )
+        .select_from(Reservation)
+        .outerjoin(User, Reservation.user_id == User.id)
+        .outerjoin(Tool, Reservation.tool_id == Tool.id)
+    )
+
+
+def reservation_to_dict(row, to_zone):
+    """Zeile aus reservation_query() → dict (Zeiten lokal, Minutengenau)."""
+    start_local = row.start_time.replace(tzinfo=pytz.utc).astimezone(to_zone)
+    end_local = row.end_time.replace(tzinfo=pytz.utc).astimezone(to_zone)
+    return {
+        "id": row.id,
+        "start": start_local.strftime("%Y-%m-%d %H:%M"),
+        "end": end_local.strftime("%Y-%m-%d %H:%M"),
+        "note": row.note,
+        "user": {
+            "id": row.user_id,
+            "username": row.username,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+        },
+        "tool": {
+            "id": row.tool_id,
+            "name": row.tool_name or row.tool_qr_code,
+            "qr_code": row.tool_qr_code,
+        },
+    }
+
+
+# -----------------------------
+# JSON-Ausgabe
+# -----------------------------
+def dumps(data):
+    """JSON als bytes; Schlüssel sortiert wie bei jsonify."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+
+
+def json_response(data, status=200):
+    return Response(dumps(data), status=status, mimetype="application/json")
@@ -0,0 +1,195 @@
+# backend/utils/tool_info.py
+# Werkzeug-Info für den Scan-Kiosk ("tool zuerst gescannt"): Werkzeug, aktive
+# und nächste Reservationen aus einer einzigen Abfrage, kurz gecacht pro Tool.
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+import pytz
+from pytz import timezone
+from sqlalchemy import event
+from models import db, Tool, Reservation, User
+from utils.qr_lookup import normalize_qr, qr_cache
+
+# Maximale Lebensdauer eines Eintrags (Änderungen anderer Worker)
+TOOL_INFO_TTL = timedelta(seconds=10)
+CACHE_SIZE = 1024
+UPCOMING_COUNT = 2
+# Reservationen eines Tools überschneiden sich nicht, können aber aneinander
+# anschliessen – zwei davon können "jetzt" aktiv sein, danach die nächsten
+_ROW_LIMIT = 2 + UPCOMING_COUNT
+
+
+class ToolInfoCache:
+    """
+    Tool-ID → (qr_key, gültig bis, Antwort). Ein Eintrag verfällt nach
+    TOOL_INFO_TTL oder früher, sobald die aktive Reservation endet bzw. die
+    nächste beginnt. Reservations- und Werkzeugänderungen verwerfen den
+    Eintrag des betroffenen Tools nach dem Commit.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self._size = size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, tool_id, key, now):
+        with self._lock:
+            entry = self._entries.get(tool_id)
+            if entry is None:
+                return None
+            entry_key, expires, data = entry
+            if entry_key != key or expires <= now:
+                del self._entries[tool_id]
+                return None
+            self._entries.move_to_end(tool_id)
+            return data
+
+    def put(self, tool_id, key, expires, data):
+        with self._lock:
+            self._entries[tool_id] = (key, expires, data)
+            self._entries.move_to_end(tool_id)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def discard(self, tool_id):
+        with self._lock:
+            self._entries.pop(tool_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+tool_info_cache = ToolInfoCache()
+
+
+def _res_to_dict(start, end, first_name, last_name, zurich):
+    start_local = start.replace(tzinfo=pytz.utc).astimezone(zurich)
+    end_local = end.replace(tzinfo=pytz.utc).astimezone(zurich)
+    return {
+        "user": {"first_name": first_name, "last_name": last_name},
+        "start": start_local.strftime("%Y-%m-%d %H:%M"),
+        "end": end_local.strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def _load(key, now):
+    """
+    Eine Abfrage: Werkzeug über qr_key, dazu (LEFT JOIN) die noch nicht
+    beendeten Reservationen samt Benutzernamen, nach Startzeit sortiert.
+    Liefert (tool_id, gültig bis, Antwort) oder None.
+    """
+    rows = (
+        db.session.query(
+            Tool.id,
+            Tool.name,
+            Tool.qr_code,
+            Tool.is_borrowed,
+            Reservation.start_time,
+            Reservation.end_time,
+            User.first_name,
+            User.last_name,
+        )
+        .select_from(Tool)
+        .outerjoin(
+            Reservation,
+            db.and_(Reservation.tool_id == Tool.id, Reservation.end_time >= now),
+        )
+        .outerjoin(User, Reservation.user_id == User.id)
+        .filter(Tool.qr_key == key)
+        .order_by(Reservation.start_time.asc())
+        .limit(_ROW_LIMIT)
+        .all()
+    )
+    if not rows:
+        return None
+
+    tool_id, name, qr_code, is_borrowed = rows[0][:4]
+    zurich = timezone("Europe/Zurich")
+    expires = now + TOOL_INFO_TTL
+    active = None
+    upcoming = []
+    for _, _, _, _, start, end, first_name, last_name in rows:
+        if start is None:
+            continue
+        if start <= now:
+            if active is None:
+                active = _res_to_dict(start, end, first_name, last_name, zurich)
+                expires = min(expires, end + timedelta(microseconds=1))
+        elif len(upcoming) < UPCOMING_COUNT:
+            upcoming.append(_res_to_dict(start, end, first_name, last_name, zurich))
+            expires = min(expires, start)
+
+    data = {
+        "tool": {"name": name, "qr_code": qr_code, "is_borrowed": is_borrowed},
+        "active_reservation": active,
+        "upcoming_reservations": upcoming,
+    }
+    return tool_id, expires, data
+
+
+def get_tool_info(code):
+    """Info-Antwort zum gescannten QR-Code oder None, falls unbekannt."""
+    key = normalize_qr(code)
+    if not key:
+        return None
+    now = datetime.utcnow()
+
+    tool_id = qr_cache.get(Tool, key)
+    if tool_id is not None:
+        data = tool_info_cache.get(tool_id, key, now)
+        if data is not None:
+            return data
+
+    loaded = _load(key, now)
+    if loaded is None:
+        return None
+    tool_id, expires, data = loaded
+    qr_cache.put(Tool, key, tool_id)
+    tool_info_cache.put(tool_id, key, expires, data)
+    return data
+
+
+# -----------------------------
+# Invalidierung nach Commit (Reservationen und Werkzeuge)
+# -----------------------------
+_PENDING_KEY = "tool_info_ops"
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_tool_info_changes(session, flush_context):
+    tool_ids = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Reservation):
+            history = db.inspect(obj).attrs.tool_id.history
+            tool_ids.update(history.deleted or ())
+            tool_ids.add(obj.tool_id)
+        elif isinstance(obj, Tool):
+            tool_ids.add(obj.id)
+        elif isinstance(obj, User):
+            # Namensänderung betrifft alle Tools mit Reservationen des
+            # Benutzers → None = ganzen Cache verwerfen
+            attrs = db.inspect(obj).attrs
+            if (
+                obj in session.deleted
+                or attrs.first_name.history.has_changes()
+                or attrs.last_name.history.has_changes()
+            ):
+                tool_ids.add(None)
+
+
+@event.listens_for(db.session, "after_commit")
+def _apply_tool_info_changes(session):
+    tool_ids = session.info.pop(_PENDING_KEY, None)
+    if not tool_ids:
+        return
+    if None in tool_ids:
+        tool_info_cache.clear()
+        return
+    for tool_id in tool_ids:
+        tool_info_cache.discard(tool_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_tool_info_changes(session):
+    session.info.pop(_PENDING_KEY, None)
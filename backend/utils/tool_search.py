@@ -0,0 +1,137 @@
+# backend/utils/tool_search.py
+# Volltextsuche über Werkzeuge (SQLite FTS5).
+#
+# Die virtuelle Tabelle tool_search (rowid = tool.id) wird über Trigger auf
+# tool und tool_categories gepflegt – damit bleiben auch Core-UPDATEs und
+# Bulk-Imports ohne ORM-Events synchron.
+import re
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models import db
+
+TABLE = "tool_search"
+
+# Buchstaben am Anfang des QR-Codes (TOOL0001 → 0001 → 1), damit auch nach
+# der Nummer allein gesucht werden kann
+_QR_PREFIX_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+def _qr_terms(col):
+    digits = f"ltrim({col}, '{_QR_PREFIX_CHARS}')"
+    return f"{col} || ' ' || {digits} || ' ' || ltrim({digits}, '0')"
+
+
+def _row_select(tool):
+    """SELECT-Ausdrücke (rowid, name, qr, category) für ein Tool-Alias."""
+    return (
+        f"{tool}.id, {tool}.name, {_qr_terms(f'{tool}.qr_code')}, "
+        f"coalesce((SELECT name FROM tool_categories "
+        f"WHERE id = {tool}.category_id), '')"
+    )
+
+
+_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+        name, qr, category,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tool_search_ai AFTER INSERT ON tool BEGIN
+        INSERT INTO {TABLE} (rowid, name, qr, category)
+        SELECT {_row_select("new")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tool_search_au
+    AFTER UPDATE OF name, qr_code, category_id ON tool BEGIN
+        DELETE FROM {TABLE} WHERE rowid = old.id;
+        INSERT INTO {TABLE} (rowid, name, qr, category)
+        SELECT {_row_select("new")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tool_search_ad AFTER DELETE ON tool BEGIN
+        DELETE FROM {TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tool_search_cu
+    AFTER UPDATE OF name ON tool_categories BEGIN
+        UPDATE {TABLE} SET category = new.name
+        WHERE rowid IN (SELECT id FROM tool WHERE category_id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tool_search_cd
+    AFTER DELETE ON tool_categories BEGIN
+        UPDATE {TABLE} SET category = ''
+        WHERE rowid IN (SELECT id FROM tool WHERE category_id = old.id);
+    END
+    """,
+]
+
+_available = False
+
+
+def ensure_tool_search():
+    """
+    Legt Index und Trigger an (idempotent) und baut den Index neu auf, falls er
+    nicht zur tool-Tabelle passt (z. B. bestehende DB vor Einführung der Suche).
+    Ohne FTS5-Unterstützung in SQLite bleibt die Suche beim LIKE-Fallback.
+    """
+    global _available
+    try:
+        with db.engine.begin() as conn:
+            for ddl in _DDL:
+                conn.execute(text(ddl))
+            indexed = conn.execute(text(f"SELECT count(*) FROM {TABLE}")).scalar()
+            tools = conn.execute(text("SELECT count(*) FROM tool")).scalar()
+            if indexed != tools:
+                conn.execute(text(f"DELETE FROM {TABLE}"))
+                conn.execute(
+                    text(
+                        f"INSERT INTO {TABLE} (rowid, name, qr, category) "
+                        f"SELECT {_row_select('t')} FROM tool t"
+                    )
+                )
+    except OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        _available = False
+        return False
+    _available = True
+    return True
+
+
+def build_match(query):
+    """
+    Wandelt eine Benutzereingabe in einen FTS5-Ausdruck um: jedes Wort als
+    Präfix, alle Wörter müssen vorkommen. None, wenn nichts Suchbares übrig bleibt.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_tool_ids(query, limit):
+    """
+    Tool-IDs nach Relevanz (Name vor QR-Code vor Kategorie).
+    None, wenn die Suche nicht über den Index laufen kann (→ LIKE-Fallback).
+    Der Index findet nur Wortanfänge; bei leerem Ergebnis sucht der Aufrufer
+    per LIKE nach Wortteilen.
+    """
+    match = build_match(query) if _available else None
+    if not match:
+        return None
+    rows = db.session.execute(
+        text(
+            f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH :match "
+            f"ORDER BY bm25({TABLE}, 10.0, 5.0, 1.0) LIMIT :limit"
+        ),
+        {"match": match, "limit": limit},
+    )
+    return [row[0] for row in rows]
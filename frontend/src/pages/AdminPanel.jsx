@@ -721,7 +721,10 @@ function AdminPanel() {
                 <td>{log.id}</td>
                 <td>{log.username}</td>
                 <td>{log.action}</td>
-                <td>{log.details}</td>
+                <td>
+                  {log.details}
+                  {log.count > 1 && ` (×${log.count})`}
+                </td>
                 <td>{log.timestamp.replace("T", " ").slice(0, 16)}</td>
               </tr>
             ))}